@@ -0,0 +1,159 @@
+import json
+import os
+from string import Formatter
+
+import numpy as np
+import pandas as pd
+
+
+# Reglas de sourcing en orden de prioridad: gana la primera que se cumple.
+# Una regla se cumple cuando la posición lleva al menos `dias_min` días hábiles
+# abierta y la `medida` ("indeed" o "acumulado") está por debajo del `umbral`.
+# El mensaje puede usar {acumulado} y {faltan}.
+REGLAS_SOURCING = [
+    {"codigo": "instantly", "dias_min": 1, "medida": "indeed", "umbral": 30,
+     "mensaje": "Es necesario lanzar una campaña en Instantly", "color": "#ede880"},
+    {"codigo": "whatsapp", "dias_min": 3, "medida": "acumulado", "umbral": 50,
+     "mensaje": "Te recomiendo una campaña por WhatsApp", "color": "#ed8f80"},
+    {"codigo": "linkedin", "dias_min": 4, "medida": "acumulado", "umbral": 60,
+     "mensaje": "Necesitas una campaña de LinkedIn", "color": "#ed80cc"},
+    {"codigo": "critico", "dias_min": 5, "medida": "acumulado", "umbral": 80,
+     "mensaje": "Estado crítico: hay actualmente {acumulado} candidatos, faltan {faltan}. Iniciar búsqueda directa", "color": "#e84646"},
+]
+
+SIN_ALERTA = {"codigo": "ok", "mensaje": "Sin alertas - sourcing OK", "color": "#d7ed80"}
+
+# Columnas de los registros de las que dependen las alertas de una posición
+COLUMNAS_MARCA = [
+    "Posicion", "Fecha", "Nombre reclutador", "Recruitment. Candidatos Indeed",
+    "Recruitment. Candidatos nuevos", "Fuente",
+]
+
+
+# Umbrales propios de cada cliente (columna "Fuente"), por ejemplo:
+# {"Cliente X": {"critico": {"umbral": 100, "dias_min": 6}}}
+def cargar_umbrales_por_fuente(ruta=None):
+    ruta = ruta or os.environ.get("REGLAS_ALERTAS", "reglas_alertas.json")
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Creamos la función para evaluar las alertas de sourcing
+def evaluar_alertas_sourcing(df, fechas_apertura, umbrales_por_fuente=None, reglas=REGLAS_SOURCING):
+    acumulados = acumular_sourcing(df)
+
+    # Unimos los días hábiles desde la apertura hasta hoy
+    dias = fechas_apertura[["Posicion", "Dias_habiles_abierta"]].rename(columns={"Dias_habiles_abierta": "Dias_habiles"})
+    acumulados = acumulados.merge(dias, on="Posicion", how="left")
+
+    return aplicar_reglas(acumulados, umbrales_por_fuente, reglas)
+
+
+# Acumulados por posición que usan las reglas, sin los días hábiles: esos
+# cambian cada día aunque los registros no cambien (ver revisar_alertas.py)
+def acumular_sourcing(df):
+    columnas = {
+        "Fecha": "min",
+        "Nombre reclutador": "first",
+        "Recruitment. Candidatos Indeed": "first",  # sólo usamos el valor inicial
+        "Recruitment. Candidatos nuevos": "sum"     # acumulamos los nuevos
+    }
+    if "Fuente" in df.columns:
+        columnas["Fuente"] = "first"
+    acumulados = df.groupby("Posicion", observed=True).agg(columnas)
+    return acumulados.rename(columns={"Fecha": "Fecha_apertura"}).reset_index()
+
+
+# Marca de agua de cada posición sobre las columnas que usan las reglas:
+# "filas:suma:primera" con el número de registros, la suma de sus hashes y el
+# hash del primero (las reglas toman el primer valor de Indeed). Si cambia
+# cualquier registro de la posición, cambia su marca.
+def marcas_por_posicion(df):
+    columnas = [col for col in COLUMNAS_MARCA if col in df.columns]
+    posiciones = df["Posicion"]
+    if not isinstance(posiciones.dtype, pd.CategoricalDtype):
+        posiciones = posiciones.astype("category")
+    codigos = posiciones.cat.codes.to_numpy()
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    hashes = pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()[validos]
+
+    categorias = len(posiciones.cat.categories)
+    filas = np.bincount(codigos, minlength=categorias)
+    suma = np.zeros(categorias, dtype=np.uint64)
+    np.add.at(suma, codigos, hashes)
+    presentes, primeras = np.unique(codigos, return_index=True)
+    return {
+        str(posiciones.cat.categories[codigo]): f"{filas[codigo]}:{suma[codigo]:x}:{hashes[primera]:x}"
+        for codigo, primera in zip(presentes, primeras)
+    }
+
+
+# Evalúa todas las reglas sobre columnas completas con np.select y agrega
+# "Codigo alerta" y "Alerta sourcing" a los acumulados por posición
+def aplicar_reglas(acumulados, umbrales_por_fuente=None, reglas=REGLAS_SOURCING):
+    dias = acumulados["Dias_habiles"].to_numpy()
+    indeed = acumulados["Recruitment. Candidatos Indeed"]
+    acumulado_total = indeed + acumulados["Recruitment. Candidatos nuevos"]
+    medidas = {"indeed": indeed.to_numpy(), "acumulado": acumulado_total.to_numpy()}
+
+    condiciones = []
+    umbrales = []
+    for regla in reglas:
+        dias_min = _parametro_por_fila(acumulados, regla, "dias_min", umbrales_por_fuente)
+        umbral = _parametro_por_fila(acumulados, regla, "umbral", umbrales_por_fuente)
+        condiciones.append((dias >= dias_min) & (medidas[regla["medida"]] < umbral))
+        umbrales.append(umbral)
+
+    indice = np.select(condiciones, np.arange(len(reglas)), default=len(reglas))
+    codigos = np.array([regla["codigo"] for regla in reglas] + [SIN_ALERTA["codigo"]])
+
+    mensajes = pd.Series(SIN_ALERTA["mensaje"], index=acumulados.index, dtype=object)
+    for i, regla in enumerate(reglas):
+        filas = indice == i
+        if filas.any():
+            valores = {
+                "acumulado": acumulado_total[filas],
+                "faltan": pd.Series(umbrales[i], index=acumulados.index)[filas] - acumulado_total[filas],
+            }
+            mensajes[filas] = _formatear(regla["mensaje"], valores)
+
+    acumulados["Codigo alerta"] = pd.Categorical(codigos[indice], categories=codigos)
+    acumulados["Alerta sourcing"] = mensajes
+    return acumulados[["Posicion", "Codigo alerta", "Alerta sourcing"]]
+
+
+# Estilo de la tabla de alertas a partir del código precalculado
+def estilo_alertas(alertas, columnas=("Posicion", "Alerta sourcing"), reglas=REGLAS_SOURCING):
+    colores = {regla["codigo"]: regla["color"] for regla in reglas + [SIN_ALERTA]}
+    estilo_por_codigo = {codigo: f'background-color: {color}; font-weight: bold;' for codigo, color in colores.items()}
+    visibles = alertas[list(columnas)]
+    css = pd.DataFrame("", index=visibles.index, columns=visibles.columns)
+    css["Alerta sourcing"] = alertas["Codigo alerta"].astype(str).map(estilo_por_codigo).fillna("")
+    return visibles.style.apply(lambda _: css, axis=None)
+
+
+def _parametro_por_fila(acumulados, regla, parametro, umbrales_por_fuente):
+    valor = regla[parametro]
+    if not umbrales_por_fuente or "Fuente" not in acumulados.columns:
+        return valor
+    por_fuente = {
+        fuente: reglas[regla["codigo"]][parametro]
+        for fuente, reglas in umbrales_por_fuente.items()
+        if parametro in reglas.get(regla["codigo"], {})
+    }
+    if not por_fuente:
+        return valor
+    return acumulados["Fuente"].astype(object).map(por_fuente).fillna(valor).to_numpy()
+
+
+# Arma el mensaje de una regla por concatenación de columnas, sin format() por fila
+def _formatear(plantilla, valores):
+    resultado = None
+    for literal, campo, _, _ in Formatter().parse(plantilla):
+        partes = [literal] if campo is None else [literal, valores[campo].astype(str)]
+        for parte in partes:
+            resultado = parte if resultado is None else resultado + parte
+    return resultado
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from alertas import evaluar_alertas_sourcing
+from calculos import grafo, PERIODOS
+from cubo import CuboPeriodos
+from dias_habiles import ContadorDiasHabiles, calendario_mexico
+from embudo import AgregadoEmbudo
+from graficas import renderizar, GRAFICAS_POR_VISTA
+from limpieza import leer_csv_limpio, COLS_TO_NUMERIC
+from tablas_derivadas import TablasDerivadas
+
+
+# Mide cuánto tarda cada etapa del dashboard con Sheets sintéticos de distintos
+# tamaños, sin red ni Streamlit. El resultado es un JSON para comparar commits:
+#   python benchmark.py --filas 1000 100000 1000000 --salida benchmark.json
+
+FILAS_POR_DEFECTO = [1_000, 100_000, 1_000_000]
+
+# --- Datos sintéticos ---
+
+# Sheet crudo con el mismo esquema que el real: encabezados con espacios,
+# fechas dd/mm/aaaa, valores como "<5" o "N/A" y una columna que no se usa.
+# Cada posición tiene un bloque de renglones repartidos entre su apertura y hoy.
+def generar_sheet(filas, semilla=0, posiciones=None, hoy=None):
+    rng = np.random.default_rng(semilla)
+    hoy = (hoy if hoy is not None else pd.Timestamp.today()).normalize()
+    posiciones = posiciones or int(np.clip(filas // 250, 4, 500))
+    posiciones = min(posiciones, filas)
+
+    posicion = np.arange(filas) * posiciones // filas
+    inicio_bloque = np.searchsorted(posicion, np.arange(posiciones))
+    largo_bloque = np.diff(np.r_[inicio_bloque, filas])
+    renglon = np.arange(filas) - inicio_bloque[posicion]
+
+    # Días que lleva abierta cada posición y fecha de cada renglón dentro de ese lapso
+    dias_abierta = rng.integers(10, 365, posiciones)
+    atraso = rng.integers(0, 30, posiciones)
+    # El último renglón queda solo en su día para que sea el registro más reciente
+    ultimo = renglon == largo_bloque[posicion] - 1
+    dia = np.where(ultimo, dias_abierta[posicion], renglon * dias_abierta[posicion] // largo_bloque[posicion])
+    fechas = hoy - pd.to_timedelta(atraso[posicion] + dias_abierta[posicion] - dia, unit="D")
+
+    reclutador = rng.integers(0, max(3, posiciones // 20), posiciones)
+    cerrada = rng.random(posiciones) < 0.4
+
+    sheet = {
+        "Posicion ": np.char.add(np.char.add(" Pos ", posicion.astype(str)), " "),
+        "Fecha": fechas.strftime("%d/%m/%Y"),
+        " Nombre reclutador": np.char.add("Reclutador ", reclutador[posicion].astype(str)),
+        "¿Posicion abierta?": np.where(cerrada[posicion] & ultimo, "No", "Si"),
+        "Terna": np.where(rng.random(filas) < 0.2, rng.integers(1, 4, filas), 0),
+        "Comentarios": "sin comentarios",
+    }
+    for col in COLS_TO_NUMERIC:
+        sheet[col] = rng.integers(0, 12, filas)
+    sheet["Recruitment. Candidatos Indeed"] = rng.integers(0, 45, filas)
+    sheet["Candidatos contratados"] = (rng.random(filas) < 0.01).astype(int)
+
+    df = pd.DataFrame(sheet)
+    for col, valor in [("Recruitment. Candidatos Indeed", "<5"), ("Recruitment. Candidatos R.CRM", "N/A")]:
+        df[col] = df[col].astype(object)
+        df.loc[rng.random(filas) < 0.05, col] = valor
+    return df
+
+
+# --- Medición ---
+
+# Ejecuta la función varias veces y devuelve el último resultado y los tiempos
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return resultado, tiempos
+
+
+def construir_graficas(vista, valores):
+    for _, construir, entradas in GRAFICAS_POR_VISTA[vista]:
+        fig = construir(*[grafo.evaluar(entrada, valores) for entrada in entradas])
+        if fig is not None:
+            renderizar(fig)
+
+
+def correr(filas, repeticiones, directorio, semilla=0):
+    resultados = []
+
+    def registrar(etapa, tiempos, **extra):
+        resultados.append(dict({
+            "filas": filas,
+            "etapa": etapa,
+            "mejor_s": round(min(tiempos), 6),
+            "mediana_s": round(statistics.median(tiempos), 6),
+            "repeticiones": len(tiempos),
+        }, **extra))
+
+    ruta = os.path.join(directorio, f"sheet_{filas}.csv")
+    generar_sheet(filas, semilla).to_csv(ruta, index=False)
+
+    df, tiempos = medir(lambda: leer_csv_limpio(ruta), repeticiones)
+    registrar("carga_limpieza", tiempos, bytes_csv=os.path.getsize(ruta))
+
+    # Única pasada de agregación del embudo, descartes y conversión
+    agregado, tiempos = medir(lambda: AgregadoEmbudo(df), repeticiones)
+    registrar("agregado_embudo", tiempos)
+    cubo = CuboPeriodos(agregado.sumas.reset_index())
+
+    fecha_max = df["Fecha"].max()
+    posicion = df["Posicion"].iloc[0]
+    fechas_inicio = [grafo.evaluar("fecha_inicio", {"fecha_max": fecha_max, "periodo": periodo}) for periodo in PERIODOS]
+
+    # Lo que piden las vistas por cada combinación de periodo y posición
+    def consultar_periodos():
+        for fecha_inicio in fechas_inicio:
+            for seleccion in ("Todas", posicion):
+                cubo.diario(fecha_inicio, fecha_max, seleccion)
+                agregado.embudo(fecha_inicio, fecha_max, seleccion)
+    _, tiempos = medir(consultar_periodos, repeticiones)
+    registrar("consultas_periodo", tiempos, combinaciones=2 * len(fechas_inicio))
+
+    calendario = calendario_mexico()
+    hoy = pd.Timestamp.today().normalize()
+
+    # Pipeline de ternas en frío: tablas y contador de días hábiles nuevos
+    def ternas():
+        tablas = TablasDerivadas(df, ContadorDiasHabiles(calendario), hoy)
+        return tablas.ternas_largo, tablas.resumen_ternas, tablas.resumen_tabla
+    _, tiempos = medir(ternas, repeticiones)
+    registrar("ternas", tiempos)
+
+    fechas_apertura = TablasDerivadas(df, ContadorDiasHabiles(calendario), hoy).fechas_apertura
+    _, tiempos = medir(lambda: evaluar_alertas_sourcing(df, fechas_apertura), repeticiones)
+    registrar("alertas_sourcing", tiempos)
+
+    # Las gráficas reciben los nodos ya calculados: solo se mide construir y renderizar
+    base = {
+        "df": df,
+        "version": f"benchmark-{filas}-{semilla}",
+        "contador": ContadorDiasHabiles(calendario),
+        "indice_carga": None,
+        "indice_tiempos": None,
+        "posicion_sel": "Todas",
+        "periodo": "Mes",
+        "fecha_max": fecha_max,
+    }
+    for vista, graficas in GRAFICAS_POR_VISTA.items():
+        valores = dict(base)
+        for _, _, entradas in graficas:
+            for entrada in entradas:
+                grafo.evaluar(entrada, valores)
+        _, tiempos = medir(lambda: construir_graficas(vista, valores), repeticiones)
+        registrar(f"graficas: {vista}", tiempos, graficas=len(graficas))
+
+    os.remove(ruta)
+    return resultados
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas del dashboard con datos sintéticos")
+    parser.add_argument("--filas", type=int, nargs="+", default=FILAS_POR_DEFECTO)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto se imprime)")
+    args = parser.parse_args(argv)
+
+    reporte = {
+        "commit": commit_actual(),
+        "fecha": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "resultados": [],
+    }
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in args.filas:
+            print(f"Midiendo {filas} filas...", file=sys.stderr)
+            reporte["resultados"].extend(correr(filas, args.repeticiones, directorio, args.semilla))
+
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+
+# Caché compartida entre procesos o réplicas del dashboard. Guarda bytes por
+# clave con desalojo LRU por tamaño total, y un bloqueo por clave para que
+# solo un proceso calcule una entrada que falta mientras los demás esperan
+# (single-flight). Las claves llevan la versión del dataset: ver clave().
+# Se configura con variables de entorno:
+#   CACHE_COMPARTIDA=sqlite:///.cache_compartida.db   archivo local (varios procesos en una máquina)
+#   CACHE_COMPARTIDA=redis://host:6379/0              Redis (varias máquinas; pip install redis)
+#   CACHE_COMPARTIDA_MB=512                           tamaño máximo
+
+MAX_BYTES = 512 * 1024 * 1024
+
+
+def clave(version, *partes):
+    return ":".join([str(version)] + [str(parte) for parte in partes])
+
+
+class CacheCompartida(ABC):
+
+    # Segundos entre cada revisión mientras otro proceso calcula la entrada
+    espera = 0.05
+
+    @abstractmethod
+    def obtener(self, clave):
+        pass
+
+    @abstractmethod
+    def guardar(self, clave, valor):
+        pass
+
+    # Devuelve un token si se obtuvo el bloqueo, o None si lo tiene otro. El
+    # bloqueo vence solo a los `segundos`, por si el proceso que lo tenía muere.
+    @abstractmethod
+    def tomar_bloqueo(self, clave, segundos):
+        pass
+
+    @abstractmethod
+    def soltar_bloqueo(self, clave, token):
+        pass
+
+    # Valor de la clave; si no está lo calcula un solo proceso y los demás
+    # esperan a que aparezca. Si el que calculaba no termina antes de que venza
+    # el bloqueo, otro lo toma y lo vuelve a intentar.
+    def obtener_o_calcular(self, clave, calcular, bloqueo=300):
+        valor = self.obtener(clave)
+        while valor is None:
+            token = self.tomar_bloqueo(clave, bloqueo)
+            if token is not None:
+                try:
+                    valor = self.obtener(clave)
+                    if valor is None:
+                        valor = calcular()
+                        self.guardar(clave, valor)
+                finally:
+                    self.soltar_bloqueo(clave, token)
+            else:
+                time.sleep(self.espera)
+                valor = self.obtener(clave)
+        return valor
+
+
+# Un archivo SQLite en modo WAL, compartido por los procesos de una máquina.
+# Cada hilo usa su propia conexión.
+class CacheSQLite(CacheCompartida):
+
+    def __init__(self, ruta=".cache_compartida.db", max_bytes=MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._conexion().executescript("""
+            CREATE TABLE IF NOT EXISTS entradas (
+                clave TEXT PRIMARY KEY, valor BLOB NOT NULL, bytes INTEGER NOT NULL, usado_en REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entradas_usado_en ON entradas (usado_en);
+            CREATE TABLE IF NOT EXISTS bloqueos (clave TEXT PRIMARY KEY, token TEXT NOT NULL, vence_en REAL NOT NULL);
+        """)
+
+    def _conexion(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            self._local.conexion = conexion
+        return conexion
+
+    @contextmanager
+    def _transaccion(self):
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexion
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        conexion.execute("COMMIT")
+
+    def obtener(self, clave):
+        conexion = self._conexion()
+        fila = conexion.execute("SELECT valor FROM entradas WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            return None
+        conexion.execute("UPDATE entradas SET usado_en = ? WHERE clave = ?", (time.time(), clave))
+        return bytes(fila[0])
+
+    # Se conservan las entradas usadas más recientemente que quepan en max_bytes
+    def guardar(self, clave, valor):
+        with self._transaccion() as conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO entradas (clave, valor, bytes, usado_en) VALUES (?, ?, ?, ?)",
+                (clave, sqlite3.Binary(valor), len(valor), time.time()),
+            )
+            conexion.execute("""
+                DELETE FROM entradas WHERE clave IN (
+                    SELECT clave FROM (
+                        SELECT clave, SUM(bytes) OVER (ORDER BY usado_en DESC, clave) AS acumulado FROM entradas
+                    ) WHERE acumulado > ?
+                )
+            """, (self.max_bytes,))
+
+    def tomar_bloqueo(self, clave, segundos):
+        token = uuid.uuid4().hex
+        ahora = time.time()
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM bloqueos WHERE clave = ? AND vence_en < ?", (clave, ahora))
+            cursor = conexion.execute(
+                "INSERT OR IGNORE INTO bloqueos (clave, token, vence_en) VALUES (?, ?, ?)", (clave, token, ahora + segundos)
+            )
+            return token if cursor.rowcount == 1 else None
+
+    def soltar_bloqueo(self, clave, token):
+        self._conexion().execute("DELETE FROM bloqueos WHERE clave = ? AND token = ?", (clave, token))
+
+
+# Redis o cualquier servidor compatible (también fakeredis para pruebas). El
+# orden LRU es un sorted set por fecha de uso y el tamaño total un contador;
+# con varios procesos escribiendo a la vez el total es aproximado.
+class CacheRedis(CacheCompartida):
+
+    def __init__(self, cliente, prefijo="dashboard:", max_bytes=MAX_BYTES):
+        self.cliente = cliente
+        self.prefijo = prefijo
+        self.max_bytes = max_bytes
+        self._lru = prefijo + "lru"
+        self._tamanos = prefijo + "bytes"
+        self._total = prefijo + "total"
+
+    def _valor(self, clave):
+        return self.prefijo + "valor:" + clave
+
+    def _bloqueo(self, clave):
+        return self.prefijo + "bloqueo:" + clave
+
+    def obtener(self, clave):
+        valor = self.cliente.get(self._valor(clave))
+        if valor is not None:
+            self.cliente.zadd(self._lru, {clave: time.time()})
+        return valor
+
+    def guardar(self, clave, valor):
+        anterior = int(self.cliente.hget(self._tamanos, clave) or 0)
+        with self.cliente.pipeline() as pipe:
+            pipe.set(self._valor(clave), valor)
+            pipe.zadd(self._lru, {clave: time.time()})
+            pipe.hset(self._tamanos, clave, len(valor))
+            pipe.incrby(self._total, len(valor) - anterior)
+            pipe.execute()
+        self._desalojar()
+
+    def _desalojar(self):
+        while int(self.cliente.get(self._total) or 0) > self.max_bytes:
+            viejas = self.cliente.zrange(self._lru, 0, 0)
+            if not viejas:
+                break
+            vieja = viejas[0].decode("utf-8") if isinstance(viejas[0], bytes) else viejas[0]
+            tamano = int(self.cliente.hget(self._tamanos, vieja) or 0)
+            with self.cliente.pipeline() as pipe:
+                pipe.delete(self._valor(vieja))
+                pipe.zrem(self._lru, vieja)
+                pipe.hdel(self._tamanos, vieja)
+                pipe.decrby(self._total, tamano)
+                pipe.execute()
+
+    def tomar_bloqueo(self, clave, segundos):
+        token = uuid.uuid4().hex
+        if self.cliente.set(self._bloqueo(clave), token, nx=True, px=int(segundos * 1000)):
+            return token
+        return None
+
+    # Solo se borra si el bloqueo sigue siendo nuestro (no venció y lo tomó otro)
+    def soltar_bloqueo(self, clave, token):
+        from redis.exceptions import WatchError
+
+        nombre = self._bloqueo(clave)
+        with self.cliente.pipeline() as pipe:
+            try:
+                pipe.watch(nombre)
+                actual = pipe.get(nombre)
+                if actual is not None and (actual.decode("utf-8") if isinstance(actual, bytes) else actual) == token:
+                    pipe.multi()
+                    pipe.delete(nombre)
+                    pipe.execute()
+            except WatchError:
+                # Otro proceso tocó el bloqueo entre el GET y el DELETE: ya no es nuestro
+                pass
+
+
+def desde_entorno():
+    url = os.environ.get("CACHE_COMPARTIDA")
+    if not url:
+        return None
+    max_bytes = int(float(os.environ.get("CACHE_COMPARTIDA_MB", MAX_BYTES / 2 ** 20)) * 2 ** 20)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        return CacheRedis(redis.Redis.from_url(url), max_bytes=max_bytes)
+    if url.startswith("sqlite:///"):
+        return CacheSQLite(url[len("sqlite:///"):], max_bytes=max_bytes)
+    raise ValueError(f"CACHE_COMPARTIDA no reconocida: {url}")
+
+
+# --- Serialización ---
+
+# DataFrames como Arrow IPC: conserva categóricas y tipos enteros
+def dataframe_a_bytes(df):
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with ipc.new_file(sink, tabla.schema) as writer:
+        writer.write_table(tabla)
+    return sink.getvalue().to_pybytes()
+
+
+def bytes_a_dataframe(datos):
+    return ipc.open_file(pa.BufferReader(datos)).read_all().to_pandas()
+
+
+def json_a_bytes(valor):
+    return json.dumps(valor).encode("utf-8")
+
+
+def bytes_a_json(datos):
+    return None if datos is None else json.loads(datos.decode("utf-8"))
@@ -0,0 +1,167 @@
+import pandas as pd
+
+from alertas import evaluar_alertas_sourcing, cargar_umbrales_por_fuente
+from grafo import GrafoPerezoso
+from tablas_derivadas import obtener_tablas
+
+
+# Nodos de cálculo del dashboard, sin nada de Streamlit, para poder usarlos
+# también desde scripts (benchmark.py). Las vistas se registran en dashboard.py.
+# Valores base: df, version, contador, indice_carga e indice_tiempos (o None),
+# posicion_sel, periodo, fecha_max
+grafo = GrafoPerezoso()
+
+PERIODOS = ["Semana", "Mes", "3 Meses", "Año"]
+
+
+# Tablas compartidas por todas las vistas, calculadas una vez por versión del dataset
+@grafo.nodo("tablas", entradas=("df", "version", "contador"))
+def calcular_tablas(df, version, contador):
+    return obtener_tablas(df, version, contador)
+
+@grafo.nodo("resumen_ternas", entradas=("tablas",))
+def calcular_resumen_ternas(tablas):
+    return tablas.resumen_ternas
+
+@grafo.nodo("resumen_tabla", entradas=("tablas",))
+def calcular_resumen_tabla(tablas):
+    return tablas.resumen_tabla
+
+# Posiciones abiertas por reclutador (según el registro más reciente de cada posición).
+# Si hay un índice de carga al día (ver carga.py) se usa ese en lugar de
+# recorrer el historial completo.
+@grafo.nodo("carga_reclutador", entradas=("tablas", "version", "indice_carga"))
+def calcular_carga_reclutador(tablas, version, indice_carga):
+    carga = indice_carga.carga(version) if indice_carga is not None else None
+    return carga if carga is not None else tablas.carga_reclutador
+
+# Qué posiciones cambiaron de estado o de reclutador con la última versión
+@grafo.nodo("cambios_carga", entradas=("version", "indice_carga"))
+def calcular_cambios_carga(version, indice_carga):
+    return indice_carga.cambios(version) if indice_carga is not None else None
+
+# Índice de tiempos de respuesta: el que mantiene el refrescador si va en esta
+# versión, si no uno calculado desde cero con las tablas
+@grafo.nodo("tiempos", entradas=("tablas", "version", "indice_tiempos"))
+def calcular_tiempos(tablas, version, indice_tiempos):
+    if indice_tiempos is not None and indice_tiempos.version == version:
+        return indice_tiempos
+    return tablas.tiempos
+
+# p50/p90 móviles de 3 meses de cada métrica, por mes y por reclutador y mes
+@grafo.nodo("percentiles_mes", entradas=("tiempos",))
+def calcular_percentiles_mes(tiempos):
+    return tiempos.percentiles()
+
+@grafo.nodo("percentiles_reclutador", entradas=("tiempos",))
+def calcular_percentiles_reclutador(tiempos):
+    return tiempos.percentiles(por=["Reclutador"])
+
+# Datos planos para graficar: un renglón por terna enviada
+@grafo.nodo("ternas_largo", entradas=("tablas",))
+def calcular_ternas_largo(tablas):
+    return tablas.ternas_largo
+
+@grafo.nodo("fecha_inicio", entradas=("fecha_max", "periodo"))
+def calcular_fecha_inicio(fecha_max, periodo):
+    if periodo == "Semana":
+        return fecha_max - pd.Timedelta(days=7)
+    elif periodo == "Mes":
+        return fecha_max - pd.DateOffset(months=1)
+    elif periodo == "3 Meses":
+        return fecha_max - pd.DateOffset(months=3)
+    return fecha_max - pd.DateOffset(years=1)
+
+# Sumas por día del periodo y posición seleccionados, sacadas del cubo
+@grafo.nodo("diario", entradas=("tablas", "fecha_inicio", "fecha_max", "posicion_sel"))
+def calcular_diario(tablas, fecha_inicio, fecha_max, posicion_sel):
+    return tablas.cubo.diario(fecha_inicio, fecha_max, posicion_sel)
+
+# Sumas de todo el historial, de todas las posiciones y de la seleccionada
+@grafo.nodo("totales", entradas=("tablas",))
+def calcular_totales(tablas):
+    return tablas.embudo.totales()
+
+@grafo.nodo("totales_posicion", entradas=("tablas", "posicion_sel"))
+def calcular_totales_posicion(tablas, posicion_sel):
+    return tablas.embudo.totales(posicion_sel)
+
+# Embudo del periodo y posición seleccionados
+@grafo.nodo("embudo", entradas=("tablas", "fecha_inicio", "fecha_max", "posicion_sel"))
+def calcular_embudo(tablas, fecha_inicio, fecha_max, posicion_sel):
+    return tablas.embudo.embudo(fecha_inicio, fecha_max, posicion_sel)
+
+# Embudo de todo el historial de la posición seleccionada. Este nodo y los
+# demás que solo usa el detalle por posición devuelven None con "Todas" sin
+# tocar las tablas: el detalle entonces solo pide elegir una posición.
+@grafo.nodo("embudo_posicion", entradas=("tablas", "posicion_sel"))
+def calcular_embudo_posicion(tablas, posicion_sel):
+    if posicion_sel == "Todas":
+        return None
+    return tablas.embudo.embudo(posicion=posicion_sel)
+
+# Sumas y tasa de conversión por posición
+@grafo.nodo("conversion", entradas=("tablas",))
+def calcular_conversion(tablas):
+    return tablas.embudo.por_posicion()
+
+# Registros de la posición seleccionada (todo el df con "Todas"), sin filtrar por periodo
+@grafo.nodo("df_posicion", entradas=("df", "tablas", "posicion_sel"))
+def calcular_df_posicion(df, tablas, posicion_sel):
+    if posicion_sel == "Todas":
+        return df
+    return tablas.indice_posiciones.filas(posicion_sel)
+
+# Renglón del resumen precalculado de la posición, o None con "Todas"
+@grafo.nodo("resumen_posicion", entradas=("tablas", "posicion_sel"))
+def calcular_resumen_posicion(tablas, posicion_sel):
+    if posicion_sel == "Todas":
+        return None
+    resumen = tablas.resumen_posiciones
+    if posicion_sel not in resumen.index:
+        return None
+    return resumen.loc[posicion_sel]
+
+# Historial completo por día de la posición seleccionada
+@grafo.nodo("historial_posicion", entradas=("tablas", "posicion_sel"))
+def calcular_historial_posicion(tablas, posicion_sel):
+    if posicion_sel == "Todas":
+        return None
+    return tablas.cubo.diario(posicion=posicion_sel)
+
+# Ternas de la posición seleccionada con el mismo formato que ternas_largo
+@grafo.nodo("ternas_posicion", entradas=("df_posicion", "contador", "posicion_sel"))
+def calcular_ternas_posicion(df_posicion, contador, posicion_sel):
+    if posicion_sel == "Todas":
+        return None
+    ternas = df_posicion[df_posicion["Terna"] > 0]
+    apertura = df_posicion["Fecha"].min()
+    return pd.DataFrame({
+        "Posicion": ternas["Posicion"],
+        "Reclutador": ternas["Nombre reclutador"],
+        "Fecha": ternas["Fecha"],
+        "Dias_habiles": contador.contar(apertura, ternas["Fecha"]),
+        "Terna": ternas["Terna"],
+    }).reset_index(drop=True)
+
+# Evaluamos sourcing health
+@grafo.nodo("alertas_sourcing", entradas=("df", "tablas"))
+def calcular_alertas_sourcing(df, tablas):
+    return evaluar_alertas_sourcing(df, tablas.fechas_apertura, cargar_umbrales_por_fuente())
+
+# Posiciones cerradas según su último registro, con apertura y cierre en días hábiles
+@grafo.nodo("cerradas", entradas=("tablas", "contador"))
+def calcular_cerradas(tablas, contador):
+    cerradas = tablas.cerradas.merge(tablas.fechas_apertura, on="Posicion")
+    cerradas["Dias_para_cerrar"] = contador.contar(cerradas["Fecha_apertura"], cerradas["Fecha"])
+    return cerradas
+
+# Conversión y descartes de las posiciones cerradas, desde el agregado del embudo
+@grafo.nodo("conversion_cerradas", entradas=("tablas", "cerradas"))
+def calcular_conversion_cerradas(tablas, cerradas):
+    return tablas.embudo.por_posicion(cerradas["Posicion"])
+
+@grafo.nodo("descarte_cerradas", entradas=("tablas", "cerradas"))
+def calcular_descarte_cerradas(tablas, cerradas):
+    return tablas.embudo.por_reclutador(cerradas["Posicion"])
+
@@ -0,0 +1,141 @@
+import pandas as pd
+
+
+# Índice de carga laboral por reclutador. Guarda el último registro de cada
+# posición y, por reclutador, cuántas tiene abiertas y cerradas y la lista de
+# las abiertas. Se actualiza con las filas nuevas o modificadas de cada
+# versión del Sheet (el delta del snapshot) en lugar de recorrer todo el
+# historial; solo se recalculan los reclutadores afectados.
+#
+# Cada actualización deja un estado nuevo e inmutable, así quien lo esté
+# leyendo desde otra sesión nunca ve uno a medias:
+#   {"version", "ultimos", "por_reclutador", "cambios"}
+class IndiceCarga:
+
+    def __init__(self):
+        self._estado = None
+
+    def estado(self):
+        return self._estado
+
+    @property
+    def version(self):
+        estado = self._estado
+        return None if estado is None else estado["version"]
+
+    # Desde el historial completo (primer arranque o cuando no hay delta)
+    def reconstruir(self, df, version):
+        anterior = self._estado
+        ultimos = _ultimos_por_posicion(df)
+        cambios = _cambios(anterior["ultimos"], ultimos, eliminadas=True) if anterior else _sin_cambios()
+        self._estado = {
+            "version": version,
+            "ultimos": ultimos,
+            "por_reclutador": _por_reclutador(ultimos),
+            "cambios": cambios,
+        }
+
+    # Solo se recalculan las posiciones que aparecen en `filas` (el delta del
+    # snapshot), con todos sus registros tomados de `df` como en
+    # IndiceTiempos.actualizar: así el último registro sale con el mismo
+    # criterio que reconstruir() aunque haya varios el mismo día, y una fila
+    # vieja corregida no cambia el estado actual.
+    def actualizar(self, df, filas, version):
+        anterior = self._estado
+        if anterior is None:
+            raise ValueError("El índice de carga no se ha construido; usar reconstruir()")
+        actuales = anterior["ultimos"]
+        nuevos = _ultimos_por_posicion(df[df["Posicion"].isin(filas["Posicion"].unique())])
+
+        ultimos = pd.concat([actuales.drop(nuevos.index, errors="ignore"), nuevos]).sort_index()
+        afectados = set(actuales["Nombre reclutador"].reindex(nuevos.index).dropna()) | set(nuevos["Nombre reclutador"])
+        por_reclutador = pd.concat([
+            anterior["por_reclutador"].drop(list(afectados), errors="ignore"),
+            _por_reclutador(ultimos[ultimos["Nombre reclutador"].isin(afectados)]),
+        ]).sort_index()
+
+        self._estado = {
+            "version": version,
+            "ultimos": ultimos,
+            "por_reclutador": por_reclutador,
+            "cambios": _cambios(actuales, nuevos),
+        }
+
+    # Posiciones abiertas por reclutador, con la misma forma que
+    # TablasDerivadas.carga_reclutador. Con `version` devuelve None si el
+    # índice ya va en otra versión del dataset.
+    def carga(self, version=None):
+        estado = self._estado
+        if estado is None or (version is not None and estado["version"] != version):
+            return None
+        por_reclutador = estado["por_reclutador"]
+        con_abiertas = por_reclutador[por_reclutador["Posiciones abiertas"] > 0]
+        return con_abiertas.reset_index()[["Nombre reclutador", "Posiciones abiertas", "Lista de posiciones"]]
+
+    # Posiciones que se abrieron, cerraron, cambiaron de reclutador o
+    # aparecieron respecto a la versión anterior
+    def cambios(self, version=None):
+        estado = self._estado
+        if estado is None or (version is not None and estado["version"] != version):
+            return None
+        return estado["cambios"]
+
+
+# Registro más reciente de cada posición, indexado por posición
+def _ultimos_por_posicion(df):
+    df = df[["Posicion", "Fecha", "Nombre reclutador", "¿Posicion abierta?"]].reset_index(drop=True)
+    ultimos = df.loc[df.groupby("Posicion", observed=True)["Fecha"].idxmax()]
+    return pd.DataFrame(
+        {
+            "Fecha": ultimos["Fecha"].to_numpy(),
+            "Nombre reclutador": ultimos["Nombre reclutador"].astype(str).to_numpy(),
+            "Abierta": ultimos["¿Posicion abierta?"].to_numpy(dtype=bool),
+        },
+        index=pd.Index(ultimos["Posicion"].astype(str).to_numpy(), name="Posicion"),
+    ).sort_index()
+
+
+def _por_reclutador(ultimos):
+    agrupado = ultimos.groupby("Nombre reclutador")["Abierta"]
+    por_reclutador = pd.DataFrame({
+        "Posiciones abiertas": agrupado.sum().astype("int64"),
+        "Posiciones cerradas": (agrupado.size() - agrupado.sum()).astype("int64"),
+    })
+    listas = ultimos[ultimos["Abierta"]].reset_index().groupby("Nombre reclutador")["Posicion"].agg(list)
+    por_reclutador["Lista de posiciones"] = [listas.get(reclutador, []) for reclutador in por_reclutador.index]
+    return por_reclutador
+
+
+def _sin_cambios():
+    return pd.DataFrame(columns=["Posicion", "Cambio", "Reclutador anterior", "Reclutador"])
+
+
+def _cambios(antes, despues, eliminadas=False):
+    previo = antes.reindex(despues.index)
+    nueva = previo["Abierta"].isna().to_numpy()
+    abierta_antes = previo["Abierta"].eq(True).to_numpy()
+    abierta = despues["Abierta"].to_numpy()
+    otro_reclutador = (previo["Nombre reclutador"] != despues["Nombre reclutador"]).to_numpy() & ~nueva
+
+    cambio = pd.Series(None, index=despues.index, dtype=object)
+    cambio[otro_reclutador] = "Cambió de reclutador"
+    cambio[~nueva & abierta_antes & ~abierta] = "Se cerró"
+    cambio[~nueva & ~abierta_antes & abierta] = "Se reabrió"
+    cambio[nueva] = "Nueva"
+    filas = cambio.notna().to_numpy()
+    cambios = pd.DataFrame({
+        "Posicion": despues.index[filas],
+        "Cambio": cambio[filas].to_numpy(),
+        "Reclutador anterior": previo["Nombre reclutador"].to_numpy()[filas],
+        "Reclutador": despues["Nombre reclutador"].to_numpy()[filas],
+    })
+
+    if eliminadas:
+        quitadas = antes.index.difference(despues.index)
+        cambios = pd.concat([cambios, pd.DataFrame({
+            "Posicion": quitadas,
+            "Cambio": "Ya no está en el Sheet",
+            "Reclutador anterior": antes.loc[quitadas, "Nombre reclutador"].to_numpy(),
+            "Reclutador": None,
+        })], ignore_index=True)
+    return cambios
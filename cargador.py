@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+
+# Bytes que se leen de la respuesta HTTP en cada iteración
+TAMANO_BLOQUE_HTTP = 1024 * 1024
+
+
+# Cargador de Google Sheets con caché en memoria y copia local en disco.
+# El CSV se descarga por bloques directo a disco; la entrada apunta al archivo.
+# Cuándo revisar el Sheet lo decide el refrescador (ver refrescador.py).
+# - Cada revisión es condicional (If-None-Match / If-Modified-Since) contra la
+#   última copia, en memoria o en disco; con 304 no se vuelve a descargar.
+# - Si la descarga falla se usa la última copia guardada en disco.
+class CargadorSheets:
+
+    def __init__(self, directorio=".cache_sheets", timeout=10, session=None, reintentos=0, espera=1.0):
+        self.directorio = directorio
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera = espera
+        self.session = session or requests.Session()
+        self._config = {}
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    # Timeout y reintentos propios de una URL (si no, se usan los del cargador)
+    def configurar(self, url, timeout=None, reintentos=None, espera=None):
+        self._config[url] = {
+            "timeout": self.timeout if timeout is None else timeout,
+            "reintentos": self.reintentos if reintentos is None else reintentos,
+            "espera": self.espera if espera is None else espera,
+        }
+
+    def refrescar(self, url):
+        with self._lock:
+            anterior = self._entradas.get(url)
+        if anterior is None:
+            # Al arrancar se revalida la copia en disco en lugar de descargar todo
+            anterior = self._leer_disco(url)
+        try:
+            entrada = self._descargar(url, anterior)
+        except Exception:
+            if anterior is None:
+                raise
+            return anterior
+        with self._lock:
+            self._entradas[url] = entrada
+        return entrada
+
+    # Reintenta con espera exponencial (espera, 2*espera, 4*espera...)
+    def _descargar(self, url, anterior):
+        config = self._config.get(url, {})
+        reintentos = config.get("reintentos", self.reintentos)
+        espera = config.get("espera", self.espera)
+        for intento in range(reintentos + 1):
+            try:
+                return self._descargar_una_vez(url, anterior, config.get("timeout", self.timeout))
+            except Exception:
+                if intento == reintentos:
+                    raise
+                time.sleep(espera * 2 ** intento)
+
+    def _descargar_una_vez(self, url, anterior, timeout):
+        headers = {}
+        if anterior is not None:
+            if anterior.get("etag"):
+                headers["If-None-Match"] = anterior["etag"]
+            if anterior.get("last_modified"):
+                headers["If-Modified-Since"] = anterior["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and anterior is not None:
+                # El archivo no cambió: solo renovamos la marca de tiempo
+                entrada = dict(anterior, obtenido_en=time.time())
+                self._guardar_metadatos(url, entrada)
+                return entrada
+            if response.status_code != 200:
+                raise Exception("No se pudo acceder al archivo.")
+
+            # El cuerpo se escribe a disco por bloques; nunca está completo en memoria
+            ruta_csv, _ = self._rutas(url)
+            version = _escribir_atomico(ruta_csv, response.iter_content(chunk_size=TAMANO_BLOQUE_HTTP))
+
+        entrada = {
+            "url": url,
+            "ruta": ruta_csv,
+            "version": version,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "obtenido_en": time.time(),
+        }
+        self._guardar_metadatos(url, entrada)
+        return entrada
+
+    # --- Copia local en disco ---
+    def _rutas(self, url):
+        nombre = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directorio, nombre)
+        return base + ".csv", base + ".json"
+
+    def _leer_disco(self, url):
+        ruta_csv, ruta_meta = self._rutas(url)
+        if not os.path.exists(ruta_csv):
+            return None
+        try:
+            with open(ruta_meta, encoding="utf-8") as f:
+                metadatos = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return dict(metadatos, ruta=ruta_csv)
+
+    def _guardar_metadatos(self, url, entrada):
+        _, ruta_meta = self._rutas(url)
+        try:
+            _escribir_atomico(ruta_meta, [json.dumps(entrada).encode("utf-8")])
+        except OSError:
+            pass
+
+
+# Escribe los bloques en un temporal y lo renombra al final; devuelve un hash
+# corto del contenido que sirve como versión
+def _escribir_atomico(ruta, bloques):
+    directorio = os.path.dirname(ruta) or "."
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    huella = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for bloque in bloques:
+                huella.update(bloque)
+                f.write(bloque)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return huella.hexdigest()[:16]
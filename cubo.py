@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+# Columnas numéricas que se suman por día
+COLUMNAS_CUBO = [
+    "Recruitment. Candidatos nuevos",
+    "Recruitment. Candidatos Indeed",
+    "Recruitment. Busqueda directa",
+    "Recruitment. Candidatos R.CRM",
+    "Recruitment. Candidatos Viables",
+    "Candidatos contratados",
+    "Screening. CNV. Perfil no calificado (hard skills)",
+    "Screening. CNV. Fuera de presupuesto",
+    "Screening. CNV. Soft Skills",
+    "Screening. CNV. Nivel de ingles",
+    "Screening. CNV. No se presento / Inpuntual",
+    "Screening. CNV. Localidad",
+]
+
+
+# Sumas diarias por (Posicion, Fecha) y del total de posiciones, ordenadas por
+# fecha. Cualquier combinación de periodo y posición se responde con búsqueda
+# binaria sobre las fechas en lugar de recorrer el df.
+class CuboPeriodos:
+
+    def __init__(self, df, columnas=COLUMNAS_CUBO):
+        self.columnas = [columna for columna in columnas if columna in df.columns]
+
+        # Un bloque contiguo de días por posición, en el orden de las categorías
+        por_posicion = df.groupby(["Posicion", "Fecha"], observed=True, sort=True)[self.columnas].sum()
+        self._rangos = rangos_por_posicion(por_posicion.index)
+        self._por_posicion = por_posicion.droplevel("Posicion")
+        self._fechas_posicion = self._por_posicion.index.to_numpy()
+
+        self._total = df.groupby("Fecha", sort=True)[self.columnas].sum()
+        self._fechas_total = self._total.index.to_numpy()
+
+    # Sumas por día dentro de [inicio, fin], indexadas por Fecha
+    def diario(self, inicio=None, fin=None, posicion="Todas"):
+        tabla, desde, hasta = self._ventana(inicio, fin, posicion)
+        return tabla.iloc[desde:hasta]
+
+    def _ventana(self, inicio, fin, posicion):
+        if posicion == "Todas":
+            tabla, fechas = self._total, self._fechas_total
+            base, limite = 0, len(fechas)
+        else:
+            tabla, fechas = self._por_posicion, self._fechas_posicion
+            base, limite = self._rangos.get(posicion, (0, 0))
+        desde, hasta = base, limite
+        if inicio is not None:
+            desde = base + np.searchsorted(fechas[base:limite], np.datetime64(pd.Timestamp(inicio), "ns"), side="left")
+        if fin is not None:
+            hasta = base + np.searchsorted(fechas[base:limite], np.datetime64(pd.Timestamp(fin), "ns"), side="right")
+        return tabla, desde, max(desde, hasta)
+
+
+
+# Rango [inicio, fin) de renglones de cada posición en un MultiIndex ordenado
+# cuyo primer nivel es Posicion. Los renglones sin posición no tienen rango.
+def rangos_por_posicion(indice):
+    codigos = indice.codes[0]
+    cortes = np.flatnonzero(codigos[1:] != codigos[:-1]) + 1
+    inicios = np.r_[0, cortes].astype(np.int64)
+    fines = np.r_[cortes, len(codigos)].astype(np.int64)
+    niveles = indice.levels[0]
+    return {
+        niveles[codigos[inicio]]: (int(inicio), int(fin))
+        for inicio, fin in zip(inicios, fines) if fin > inicio and codigos[inicio] >= 0
+    }
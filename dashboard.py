@@ -1,15 +1,32 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime
-import requests
-from io import StringIO
 from pandas.tseries.offsets import BDay
 import matplotlib.dates as mdates
+import os
+from cache_compartida import desde_entorno
+from cargador import CargadorSheets
+from fuentes import cargar_registro, crear_sesion
+from refrescador import Refrescador, Publicaciones
+from limpieza import resumen_calidad
+from dias_habiles import ContadorDiasHabiles, calendario_mexico
+from tablas_derivadas import obtener_tablas
+from calculos import grafo, PERIODOS
+from alertas import estilo_alertas
+from paginacion import TablaPaginada, paginas
+from instrumentacion import etapa, medido, iniciar_desde_entorno, terminar
+from graficas import (
+    CacheGraficas, grafica_carga_reclutador, grafica_ternas, grafica_ternas_interactiva, grafica_descarte_reclutadores,
+    grafica_descarte_cliente, grafica_flujo_diario, grafica_tendencias, grafica_embudo,
+    grafica_conversion, grafica_conversion_cerradas, grafica_descarte_cerradas, grafica_percentiles
+)
 
 st.set_page_config(layout="wide")
 
+# Medición por etapas de este rerun, solo si está activada (ver instrumentacion.py)
+instrumentacion = iniciar_desde_entorno()
+
 # INYECCIÓN GLOBAL DE ESTILO DEL DASHBOARD DE RECLUTAMIENTO
 
 st.markdown("""
@@ -92,31 +109,110 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Segundos entre cada revisión del Sheet por parte del refrescador
+TTL_SHEETS = 300
+
 # --- FUNCIONES AUXILIARES ---
-def cargar_datos_desde_sheets(sheet_url):
-    response = requests.get(sheet_url, timeout=10)
-    if response.status_code != 200:
+# Un solo cargador compartido por todas las sesiones del servidor
+@st.cache_resource
+def obtener_cargador(fuentes):
+    return CargadorSheets(session=crear_sesion(fuentes))
+
+# Caché compartida entre réplicas (CACHE_COMPARTIDA, ver cache_compartida.py), o None
+@st.cache_resource
+def obtener_cache_compartida():
+    return desde_entorno()
+
+@st.cache_resource
+def obtener_publicaciones():
+    return Publicaciones(cache=obtener_cache_compartida())
+
+# Un solo refrescador por servidor descarga, limpia y publica el dataset; con
+# REFRESCADOR_EXTERNO=1 lo hace un proceso aparte (python refrescador.py)
+@st.cache_resource
+def obtener_refrescador(fuentes):
+    refrescador = Refrescador(
+        fuentes, obtener_cargador(fuentes), obtener_publicaciones(), TTL_SHEETS, obtener_contador_dias(), obtener_cache_compartida()
+    )
+    refrescador.iniciar()
+    return refrescador
+
+# Índice de carga por reclutador que mantiene el refrescador; no existe cuando
+# el refrescador corre en otro proceso
+def obtener_indice_carga(fuentes):
+    if os.environ.get("REFRESCADOR_EXTERNO", "0") == "1":
+        return None
+    return obtener_refrescador(fuentes).carga
+
+# Percentiles de tiempos de respuesta que mantiene el refrescador, igual que la carga
+def obtener_indice_tiempos(fuentes):
+    if os.environ.get("REFRESCADOR_EXTERNO", "0") == "1":
+        return None
+    return obtener_refrescador(fuentes).tiempos
+
+# Devuelve la última versión publicada del dataset limpio de todas las fuentes;
+# las sesiones no descargan ni limpian nada
+@medido("carga_datos")
+def cargar_datos_desde_sheets(fuentes):
+    if os.environ.get("REFRESCADOR_EXTERNO", "0") != "1":
+        obtener_refrescador(fuentes)
+    with etapa("lectura_publicacion"):
+        publicado = obtener_publicaciones().leer()
+    if publicado is None:
         raise Exception("No se pudo acceder al archivo.")
-    response.encoding = 'latin1'
-    return pd.read_csv(StringIO(response.content.decode('utf-8')))
-
-def filtrar_datos(df, fecha_inicio, fecha_fin, posicion):
-    df = df.dropna(subset=["Fecha"])
-    df["Fecha"] = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
-    fecha_inicio = pd.to_datetime(fecha_inicio, dayfirst=True, errors="coerce")
-    fecha_fin = pd.to_datetime(fecha_fin, dayfirst=True, errors="coerce")
-
-    if pd.isna(fecha_inicio) or pd.isna(fecha_fin):
-        st.error("Las fechas seleccionadas no son válidas.")
-        st.stop()
-
-    df = df[df["Fecha"].notna()]
-    df = df[(df["Fecha"] >= fecha_inicio) & (df["Fecha"] <= fecha_fin)]
-
-    if posicion != "Todas":
-        df = df[df["Posicion"] == posicion]
+    df, version, errores = publicado
+    for error in errores:
+        st.warning(error)
+    return df, version
+
+# Días hábiles con el calendario de festivos de México; el contador guarda
+# los pares (apertura, fecha) ya calculados entre reruns
+@st.cache_resource
+def obtener_contador_dias():
+    return ContadorDiasHabiles(calendario_mexico())
+
+# Imágenes de las gráficas ya renderizadas, compartidas entre sesiones
+@st.cache_resource
+def obtener_cache_graficas():
+    return CacheGraficas()
+
+# Muestra la gráfica desde la caché o la construye si no está; devuelve False
+# si no había datos para graficar
+def mostrar_grafica(clave, construir, *args):
+    with etapa(f"grafica: {clave[0]}"):
+        imagen = obtener_cache_graficas().obtener(clave, construir, *args)
+    if imagen is None:
+        return False
+    st.image(imagen, use_container_width=True)
+    return True
+
+# Tablas paginadas en el servidor, una por (nombre, versión del dataset, día),
+# así los órdenes y el texto de búsqueda ya calculados se comparten entre
+# reruns. El día va en la clave igual que en obtener_tablas: las alertas y los
+# días hábiles abiertos cambian con la fecha aunque el Sheet no cambie.
+@st.cache_resource(max_entries=32)
+def obtener_tabla_paginada(nombre, version, hoy, _df, columnas):
+    return TablaPaginada(_df, columnas_busqueda=columnas)
+
+# Muestra solo la página visible de una tabla, con búsqueda y orden del lado
+# del servidor. `estilo` recibe la página y devuelve un Styler; las columnas
+# que use para el estilo (por ejemplo "Codigo alerta") no hace falta mostrarlas.
+def mostrar_tabla(nombre, version, df, columnas=None, estilo=None, tamano=50, height=400):
+    columnas = list(columnas or df.columns)
+    tabla = obtener_tabla_paginada(nombre, version, pd.Timestamp.today().normalize(), df, tuple(columnas))
+
+    buscar, ordenar, descendente, numero = st.columns([3, 2, 1, 1])
+    busqueda = buscar.text_input("Buscar", key=f"{nombre}_buscar", placeholder="Buscar", label_visibility="collapsed")
+    orden = ordenar.selectbox(
+        "Ordenar por", [None] + columnas, key=f"{nombre}_orden",
+        format_func=lambda columna: "Sin ordenar" if columna is None else columna, label_visibility="collapsed"
+    )
+    desc = descendente.checkbox("Desc.", key=f"{nombre}_desc")
+    pagina = numero.number_input("Página", min_value=1, value=1, step=1, key=f"{nombre}_pagina", label_visibility="collapsed")
 
-    return df
+    filas, total = tabla.pagina(pagina, tamano, orden, desc, busqueda)
+    st.dataframe(estilo(filas) if estilo else filas[columnas], use_container_width=True, height=height)
+    st.caption(f"Página {min(pagina, paginas(total, tamano))} de {paginas(total, tamano)} · {total} filas")
 
 def color_semaforo(val):
     if val <= 8:
@@ -129,127 +225,180 @@ def color_semaforo(val):
         color = '#eb5050'
     return f'background-color: {color}; text-align: center;'
 
-def color_por_carga(val):
-    if val > 5:
-        return "#EF5350"
-    elif val >= 3:
-        return "#FFEE58"
-    else:
-        return "#66BB6A"
-
-# Función de color por tipo de alerta
-def color_alerta(val):
-    val = str(val)
-    if "Estado crítico" in val:
-        color = '#e84646'  # Rojo
-    elif "LinkedIn" in val:
-        color = '#ed80cc'  # Rosa
-    elif "WhatsApp" in val:
-        color = '#ed8f80'  # Naranja
-    elif "Instantly" in val:
-        color = '#ede880'  # Amarillo
-    elif "OK" in val:
-        color = '#d7ed80'  # Verde
-    else:
-        color = '#FFFFFF'  # Blanco por default (si algo falla)
-    return f'background-color: {color}; font-weight: bold;'
+# --- VISTAS ---
+# Cada vista declara lo que necesita del grafo de cálculos (ver calculos.py)
+# y solo se calcula eso. Aquí se agrega como valor base graficas_interactivas.
 
-# Creamos la función para evaluar las alertas de sourcing
-def evaluar_alertas_sourcing(df):
-    
-    # Primero calculamos fecha de apertura por posición
-    fechas_apertura = df.groupby("Posicion")["Fecha"].min().reset_index().rename(columns={"Fecha": "Fecha_apertura"})
-    # Calculamos días hábiles desde apertura para TODAS LAS POSICIONES
-    hoy = pd.Timestamp.today().normalize()
-    fechas_apertura["Dias_habiles_abierta"] = fechas_apertura["Fecha_apertura"].apply(
-        lambda apertura: np.busday_count(apertura.date(), hoy.date())
-    )
-    
-    # Unimos la fecha de apertura al dataframe principal
-    df = df.merge(fechas_apertura, on="Posicion", how="left")
-    
-    # Calculamos días hábiles desde la apertura hasta la fecha actual
-    hoy = pd.Timestamp.today().normalize()
-    df["Dias_habiles"] = df.apply(lambda row: np.busday_count(row["Fecha_apertura"].date(), hoy.date()), axis=1)
+#Organizacipon visual de la primera página 
+@grafo.vista("Resumen General", entradas=(
+    "version", "carga_reclutador", "resumen_tabla", "ternas_largo", "alertas_sourcing", "cambios_carga", "graficas_interactivas"
+))
+def vista_resumen_general(version, resumen_completo, resumen_tabla, ternas_df, alertas_sourcing, cambios_carga, graficas_interactivas):
+
+    carga_trabajo, pos_reclutador = st.columns([1,2])
+
+    with carga_trabajo:
+        st.markdown("### Carga laboral por reclutador")
+        mostrar_grafica(("carga_reclutador", version), grafica_carga_reclutador, resumen_completo)
     
-    # Agrupamos por posición para calcular acumulados
-    acumulados = df.groupby("Posicion").agg({
-        "Fecha_apertura": "first",
-        "Nombre reclutador": "first",
-        "Dias_habiles": "first",
-        "Recruitment. Candidatos Indeed": "first",  # sólo usamos el valor inicial
-        "Recruitment. Candidatos nuevos": "sum"     # acumulamos los nuevos
-    }).reset_index()
-
-    # Ahora aplicamos las reglas de negocio
-    def determinar_alerta(row):
-        dias = row["Dias_habiles"]
-        candidatos_indeed = row["Recruitment. Candidatos Indeed"]
-        nuevos = row["Recruitment. Candidatos nuevos"]
-        acumulado_total = candidatos_indeed + nuevos
-        
-        if dias >= 1 and candidatos_indeed < 30:
-            return "Es necesario lanzar una campaña en Instantly"
-        elif dias >= 3 and acumulado_total < 50:
-            return "Te recomiendo una campaña por WhatsApp"
-        elif dias >= 4 and acumulado_total < 60:
-            return "Necesitas una campaña de LinkedIn"
-        elif dias >= 5 and acumulado_total < 80:
-            faltan = 80 - acumulado_total
-            return f"Estado crítico: hay actualmente {acumulado_total} candidatos, faltan {faltan}. Iniciar búsqueda directa"
+    with pos_reclutador:
+        st.markdown("### Detalle de posiciones abiertas")
+        mostrar_tabla("resumen_tabla", version, resumen_tabla)
+
+    ternas, alertas = st.columns([2,1])
+    with ternas:
+        st.markdown("### Envío de ternas por posición")
+        if graficas_interactivas:
+            st.altair_chart(grafica_ternas_interactiva(ternas_df), use_container_width=True)
         else:
-            return "Sin alertas - sourcing OK"
-    
-    acumulados["Alerta sourcing"] = acumulados.apply(determinar_alerta, axis=1)
+            mostrar_grafica(("ternas", version), grafica_ternas, ternas_df)
+    with alertas:
+        # Mostramos en el dashboard
+        st.markdown("### Alertas del día")
+        mostrar_tabla("alertas", version, alertas_sourcing, columnas=["Posicion", "Alerta sourcing"], estilo=estilo_alertas)
+
+        # Posiciones que se abrieron, cerraron o cambiaron de reclutador con la última actualización
+        if cambios_carga is not None and not cambios_carga.empty:
+            st.markdown("#### Cambios desde la última actualización")
+            st.dataframe(cambios_carga, use_container_width=True, hide_index=True)
+
+
+#Segunda página
+@grafo.vista("Evaluación y Conversión", entradas=(
+    "version", "posicion_sel", "periodo", "resumen_ternas", "diario", "totales", "totales_posicion", "embudo", "conversion"
+))
+def vista_evaluacion(version, posicion_sel, periodo, resumen_ternas, diario, totales, totales_posicion, embudo_periodo, conversion_posiciones):
+
+    d_reclutador, d_cliente, flujo_diario = st.columns([1,1,2])
+    with d_reclutador:
+        st.markdown("### Descarte por reclutadores")
+        mostrar_grafica(("descarte_reclutadores", version), grafica_descarte_reclutadores, totales)
+
+    with d_cliente:
+        st.markdown("### Descarte por cliente")
+        mostrar_grafica(("descarte_cliente", posicion_sel, version), grafica_descarte_cliente, totales_posicion, resumen_ternas, posicion_sel)
+
+    with flujo_diario:
+        st.markdown("### Flujo diario de candidatos")
+        mostrar_grafica(("flujo_diario", posicion_sel, periodo, version), grafica_flujo_diario, diario)
+
+    tendencias, embudo, conversion = st.columns(3)
+    with tendencias:
+        st.markdown("### Tendencia diaria por fuente vs. metas")
+        mostrar_grafica(("tendencias", posicion_sel, periodo, version), grafica_tendencias, diario)
+
+    with embudo:
+        st.markdown("### Embudo de Reclutamiento")
+        mostrar_grafica(("embudo", posicion_sel, periodo, version), grafica_embudo, embudo_periodo)
+
+    with conversion:
+        st.markdown("### Conversión de Viables a Contratados")
+        mostrar_grafica(("conversion", version), grafica_conversion, conversion_posiciones)
+
+
+@grafo.vista("Posiciones cerradas", entradas=("version", "cerradas", "conversion_cerradas", "descarte_cerradas"))
+def vista_posiciones_cerradas(version, cerradas, conversion_cerradas, descarte_cerradas):
+
+    t_cerrado, conversion, descarte = st.columns(3)
+    with t_cerrado:
+        # Mostramos tabla de tiempos de cierre
+        st.markdown("### Tiempo de cierre por posición")
+        mostrar_tabla("cerradas", version, cerradas, columnas=["Posicion", "Nombre reclutador", "Fecha_apertura", "Fecha", "Dias_para_cerrar"])
+
+    with conversion:
+        st.markdown("### Conversión en posiciones cerradas")
+        if not mostrar_grafica(("conversion_cerradas", version), grafica_conversion_cerradas, conversion_cerradas):
+            st.info("No hay datos suficientes para calcular la conversión.")
+    with descarte:
+        # Descarte por reclutador (solo cerradas)
+        st.markdown("### Descarte por reclutador (solo posiciones cerradas)")
+        if not mostrar_grafica(("descarte_cerradas", version), grafica_descarte_cerradas, descarte_cerradas):
+            st.info("No hay datos de descartes en posiciones cerradas.")
+
+
+# Percentiles móviles de 3 meses de los tiempos de respuesta (ver tiempos.py)
+@grafo.vista("Tiempos de respuesta", entradas=("version", "percentiles_mes", "percentiles_reclutador"))
+def vista_tiempos(version, percentiles_mes, percentiles_reclutador):
+
+    st.markdown("### p50 y p90 móviles de 3 meses")
+    if not mostrar_grafica(("percentiles", version), grafica_percentiles, percentiles_mes):
+        st.info("Todavía no hay ternas ni posiciones cerradas para medir tiempos.")
+        return
+
+    por_mes, por_reclutador = st.columns([1, 2])
+    with por_mes:
+        st.markdown("### Por mes")
+        mostrar_tabla("percentiles_mes", version, percentiles_mes)
+    with por_reclutador:
+        st.markdown("### Por reclutador")
+        mostrar_tabla("percentiles_reclutador", version, percentiles_reclutador)
+
+
+# Detalle de una sola posición: todo su historial, sin importar el periodo. Sus
+# registros y su resumen salen del índice por posición (ver posiciones.py).
+@grafo.vista("Detalle por posición", entradas=(
+    "version", "posicion_sel", "resumen_posicion", "historial_posicion", "ternas_posicion", "df_posicion",
+    "embudo_posicion", "totales_posicion"
+))
+def vista_detalle_posicion(version, posicion_sel, resumen, historial, ternas_df, df_posicion, embudo_posicion, totales_posicion):
+
+    if resumen is None:
+        st.info("Selecciona una posición en el filtro para ver su detalle.")
+        return
+
+    reclutador, estado, apertura, dias, ternas_enviadas, contratados = st.columns(6)
+    reclutador.metric("Reclutador", str(resumen["Nombre reclutador"]))
+    estado.metric("Estado", "Abierta" if resumen["Abierta"] else "Cerrada")
+    apertura.metric("Apertura", f"{resumen['Fecha_apertura']:%Y-%m-%d}")
+    dias.metric("Días hábiles abierta", int(resumen["Dias_habiles_abierta"]))
+    ternas_enviadas.metric("Ternas / candidatos enviados", f"{resumen['Total ternas enviadas']} / {resumen['Total candidatos enviados']}")
+    contratados.metric("Contratados", int(resumen["Candidatos contratados"]))
+
+    st.markdown("### Historial de la posición")
+    mostrar_grafica(("detalle_historial", posicion_sel, version), grafica_flujo_diario, historial)
+
+    ternas, embudo, descarte = st.columns([2,1,1])
+    with ternas:
+        st.markdown("### Envío de ternas")
+        if ternas_df.empty:
+            st.info("La posición no tiene ternas enviadas.")
+        else:
+            mostrar_grafica(("detalle_ternas", posicion_sel, version), grafica_ternas, ternas_df)
+    with embudo:
+        st.markdown("### Embudo")
+        mostrar_grafica(("detalle_embudo", posicion_sel, version), grafica_embudo, embudo_posicion)
+    with descarte:
+        st.markdown("### Razones de descarte")
+        if not mostrar_grafica(("detalle_descarte", posicion_sel, version), grafica_descarte_reclutadores, totales_posicion):
+            st.info("No hay descartes registrados.")
 
-    return acumulados[[
-        "Posicion", "Alerta sourcing"
-    ]]
+    st.markdown("### Registros")
+    st.dataframe(df_posicion, use_container_width=True, hide_index=True)
 
 
 # --- INTERFAZ DE USUARIO ---
 st.title("Dashboard de Reclutamiento")
 
-# URL por defecto
-default_sheet_url = "https://docs.google.com/spreadsheets/d/18uRbFCZ3btmnLxsfePyJ0_JURaxARa0hZl1ZbM9EQIY/export?format=csv&gid=1933021086"
+# Sheets a cargar (ver fuentes.py)
+fuentes = cargar_registro()
 
 # Mostrar opción para personalizar el link
-#st.sidebar.markdown("### Configuración")
+st.sidebar.markdown("### Configuración")
+graficas_interactivas = st.sidebar.checkbox("Gráficas interactivas", help="Dibuja el envío de ternas en el navegador con Altair")
 #usar_url_personalizada = st.sidebar.checkbox("Usar Google Sheet personalizado")
 
 #if usar_url_personalizada:
 #    sheet_url = st.sidebar.text_input("Pega aquí el link CSV de Google Sheets:")
 #else:
 
-sheet_url = default_sheet_url
-
-if sheet_url:
+pagina = None
+if fuentes:
     try:
         #Primera limpieza general y filtrado de datos
-        df = cargar_datos_desde_sheets(sheet_url)
-        df.columns = df.columns.str.strip()
-        df.replace(["<5", "N/A", "—", "-", ""], np.nan, inplace=True)
-        df = df.fillna(0)
-
-        cols_to_numeric = [
-            'Recruitment. Candidatos nuevos', 'Recruitment. Candidatos Indeed', 
-            'Recruitment. Busqueda directa', 'Recruitment. Candidatos R.CRM', 
-            'Recruitment. Assigned', 'Recruitment. Candidatos Viables',
-            'Screening. CV. MUST', 'Screening. CV. H.Skills', 'Screening. CV. S.Skills',
-            'Screening. CNV. Perfil no calificado (hard skills)', 'Screening. CNV. Soft Skills', 
-            'Screening. CNV. Fuera de presupuesto', 'Screening. CNV. Nivel de ingles',
-            'Screening. CNV. No se presento / Inpuntual', 'Screening. CNV. Localidad', 
-            'S. Cliente. Quimica personal', 'S. Cliente. Inconsistencias en expertise',
-            'S. Cliente. No cumple con el perfil', 'S. Cliente. Nivel de ingles',
-            'S. Cliente. Sobrecalificado', 'Candidatos contratados'
-        ]
-        cols_to_numeric = [col for col in cols_to_numeric if col in df.columns]
-        df[cols_to_numeric] = df[cols_to_numeric].apply(pd.to_numeric, errors='coerce').fillna(0)
-        df["Fecha"] = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
-        df = df[df["Fecha"].notna()]
-        fecha_min = df["Fecha"].min()
-        fecha_max = df["Fecha"].max()
-        df["Posicion"] = df["Posicion"].astype(str)
+        df, version = cargar_datos_desde_sheets(fuentes)
+        contador = obtener_contador_dias()
+        tablas = obtener_tablas(df, version, contador, cache=obtener_cache_compartida())
+        fecha_min, fecha_max = tablas.rango_fechas
 
         #Filtros para seleccionar páginas y más cosas
         #pagina = st.radio("Selecciona vista", ["Resumen General", "Evaluación y Conversión", "Posiciones cerradas"])
@@ -257,382 +406,43 @@ if sheet_url:
         #Primera parte del dashboard
         f_posicion, f_periodo, f_vista = st.columns(3)
         with f_posicion:
-            posicion_sel = st.selectbox("Filtrar por Posición", ["Todas"] + sorted(df["Posicion"].unique()))
+            posicion_sel = st.selectbox("Filtrar por Posición", ["Todas"] + tablas.posiciones)
         with f_periodo:
-            periodo = st.selectbox("Periodo", ["Semana", "Mes", "3 Meses", "Año"])
+            periodo = st.selectbox("Periodo", PERIODOS)
         with f_vista:
-            pagina = st.selectbox("Selecciona vista", ["Resumen General", "Evaluación y Conversión", "Posiciones cerradas"])
-
-        if periodo == "Semana":
-            fecha_inicio = fecha_max - pd.Timedelta(days=7)
-        elif periodo == "Mes":
-            fecha_inicio = fecha_max - pd.DateOffset(months=1)
-        elif periodo == "3 Meses":
-            fecha_inicio = fecha_max - pd.DateOffset(months=3)
-        else:
-            fecha_inicio = fecha_max - pd.DateOffset(years=1)
-
-        #Este df filtrado solo se tiene que usar para los KPIs no para las alertas
-        df_filtrado = filtrar_datos(df, fecha_inicio, fecha_max, posicion_sel)
-
-        #Procesos anteriores para agrupar por ternas
-        # Calculamos apertura de cada posición
-        fechas_apertura = df.groupby("Posicion")["Fecha"].min().reset_index().rename(columns={"Fecha": "Fecha_apertura"})
-
-        # Aquí agregamos los días hábiles para TODAS las posiciones
-        hoy = pd.Timestamp.today().normalize()
-        fechas_apertura["Dias_habiles_abierta"] = fechas_apertura["Fecha_apertura"].apply(
-            lambda apertura: np.busday_count(apertura.date(), hoy.date())
-        )
-
-
-        # Filtramos los registros donde efectivamente hubo envío de terna
-        df_ternas = df[df["Terna"] > 0].copy()
-
-        # Mergeamos para agregar la fecha de apertura a cada envío de terna
-        df_ternas = df_ternas.merge(fechas_apertura, on="Posicion", how="left")
-
-        # Calculamos días hábiles desde apertura a cada envío de terna
-        df_ternas["Dias_habiles_a_terna"] = df_ternas.apply(
-            lambda row: np.busday_count(row["Fecha_apertura"].date(), row["Fecha"].date()), axis=1
-        )
-
-        # Resumimos por posición:
-        resumen_ternas = df_ternas.groupby("Posicion").agg({
-            "Nombre reclutador": "first",
-            "Fecha_apertura": "first",
-            "Fecha": list,
-            "Dias_habiles_a_terna": list,
-            "Terna": list
-        }).reset_index()
-
-        # Agregamos total de ternas enviadas y total de candidatos enviados
-        resumen_ternas["Total ternas enviadas"] = resumen_ternas["Fecha"].apply(len)
-        resumen_ternas["Total candidatos enviados"] = resumen_ternas["Terna"].apply(sum)
-
-        # Reordenamos columnas para visualización
-        resumen_final = resumen_ternas[[
-            "Posicion", "Nombre reclutador", "Fecha_apertura", 
-            "Total ternas enviadas", "Total candidatos enviados", 
-            "Fecha", "Dias_habiles_a_terna", "Terna"
-        ]]
-
-        resumen_tabla = resumen_ternas[[
-            "Posicion", "Nombre reclutador", "Fecha_apertura",
-            "Total ternas enviadas", "Total candidatos enviados"
-        ]]
-        # Merge para incluir días hábiles a la tabla de detalle
-        resumen_tabla = resumen_tabla.merge(
-            fechas_apertura[["Posicion", "Dias_habiles_abierta"]],
-            on="Posicion",
-            how="left"
-        )
-
-
-        #Organizacipon visual de la primera página 
-        if pagina == "Resumen General":
-            
-            # Normalizamos los campos antes de procesar
-            df["¿Posicion abierta?"] = df["¿Posicion abierta?"].astype(str).str.lower().str.strip()
-            df["Nombre reclutador"] = df["Nombre reclutador"].astype(str).str.strip()
-            df["Posicion"] = df["Posicion"].astype(str).str.strip()
-            
-            # Eliminar registros sin fecha válida
-            df = df.dropna(subset=["Fecha"])
-            
-            # Agrupamos por posición y tomamos el registro más reciente
-            ultimos = df.loc[df.groupby("Posicion")["Fecha"].idxmax()]
-            
-            # Filtrar posiciones abiertas
-            abiertas = ultimos[ultimos["¿Posicion abierta?"] != "no"]
-            
-            # Agrupamos correctamente por reclutador
-            resumen = abiertas.groupby("Nombre reclutador").size().reset_index(name="Posiciones abiertas")
-            posiciones_por_reclutador = abiertas.groupby("Nombre reclutador")["Posicion"].apply(list).reset_index(name="Lista de posiciones")
-            resumen_completo = pd.merge(resumen, posiciones_por_reclutador, on="Nombre reclutador")
-
-            carga_trabajo, pos_reclutador = st.columns([1,2])
-
-            # Primero preparamos los datos planos para graficar
-            ternas_explotadas = []
-
-            for idx, row in resumen_final.iterrows():
-                for fecha_ts, dias_habiles, terna in zip(row["Fecha"], row["Dias_habiles_a_terna"], row["Terna"]):
-                    fecha_real = pd.to_datetime(fecha_ts, unit='ms')  # Convertimos timestamp a fecha legible
-                    ternas_explotadas.append({
-                        "Posicion": row["Posicion"],
-                        "Reclutador": row["Nombre reclutador"],
-                        "Fecha": fecha_real,
-                        "Dias_habiles": dias_habiles,
-                        "Terna": terna
-                })
-
-            ternas_df = pd.DataFrame(ternas_explotadas)
-
-            with carga_trabajo:
-                st.markdown("### Carga laboral por reclutador")
-                fig, ax = plt.subplots(figsize=(5, 3))
-                colores = [color_por_carga(x) for x in resumen_completo["Posiciones abiertas"]]
-                ax.bar(resumen_completo["Nombre reclutador"], resumen_completo["Posiciones abiertas"], color=colores)
-                ax.set_ylabel("Posiciones abiertas")
-                ax.set_xlabel("Reclutador")
-                ax.grid(True)
-                plt.xticks(rotation=45)
-                st.pyplot(fig)
-            
-            with pos_reclutador:
-                st.markdown("### Detalle de posiciones abiertas")
-                st.dataframe(resumen_tabla, use_container_width=True, height=400)
-
-            # Evaluamos sourcing health
-            alertas_sourcing = evaluar_alertas_sourcing(df)
-            
-            ternas, alertas = st.columns([2,1])
-            with ternas:
-                st.markdown("### Envío de ternas por posición")
-
-                # Creamos el gráfico
-                plt.figure(figsize=(12, 6))
-                for posicion in ternas_df["Posicion"].unique():
-                    subset = ternas_df[ternas_df["Posicion"] == posicion]
-                    plt.scatter(
-                        subset["Dias_habiles"],
-                        [posicion] * len(subset),
-                        s=subset["Terna"] * 50,  # Tamaño proporcional al número de candidatos
-                        label=posicion,
-                        alpha=0.7
-                    )
-
-                plt.xlabel("Días hábiles desde apertura")
-                plt.ylabel("Posición")
-                #plt.title("Envío de ternas por posición")
-                plt.grid(True)
-                #plt.legend(title="Posiciones", bbox_to_anchor=(1.05, 1), loc='upper left')
-                st.pyplot(plt)
-            with alertas:
-                # Mostramos en el dashboard
-                st.markdown("### Alertas del día")
-                styled_alertas = alertas_sourcing.style.applymap(color_alerta, subset=["Alerta sourcing"])
-                st.dataframe(styled_alertas, use_container_width=True, height=400)
-
-                
-        #Segunda página
-        elif pagina == "Evaluación y Conversión":
-            
-            d_reclutador, d_cliente, flujo_diario = st.columns([1,1,2])
-            with d_reclutador:
-                st.markdown("### Descarte por reclutadores")
-                etapa2 = {
-                    "Hard Skills": df.get("Screening. CNV. Perfil no calificado (hard skills)", pd.Series([0])).sum(),
-                    "Fuera de presupuesto": df.get("Screening. CNV. Fuera de presupuesto", pd.Series([0])).sum(),
-                    "Soft Skills": df.get("Screening. CNV. Soft Skills", pd.Series([0])).sum(),
-                    "Inglés": df.get("Screening. CNV. Nivel de ingles", pd.Series([0])).sum(),
-                    "No se presentó": df.get("Screening. CNV. No se presento / Inpuntual", pd.Series([0])).sum(),
-                    "Localidad": df.get("Screening. CNV. Localidad", pd.Series([0])).sum()
-                }
-                etapa2 = {k: v for k, v in etapa2.items() if v > 0}
-                if etapa2:
-                    fig3, ax3 = plt.subplots(figsize=(8, 4.5))
-                    ax3.pie(etapa2.values(), labels=etapa2.keys(), autopct='%1.1f%%', startangle=140, colors=plt.get_cmap('Pastel1').colors)
-                    ax3.axis('equal')
-                    st.pyplot(fig3)
-                    plt.tight_layout(pad=2.0)
-
-
-            with d_cliente:
-                st.markdown("### Descarte por cliente")
-                if posicion_sel == "Todas":
-                    df_posicion = df
-                    resumen_ternas_posicion = resumen_ternas
-                else:
-                    df_posicion = df[df["Posicion"] == posicion_sel]
-                    resumen_ternas_posicion = resumen_ternas[resumen_ternas["Posicion"] == posicion_sel]
-            
-                total_ternados = resumen_ternas_posicion["Total candidatos enviados"].sum() or 0
-                total_contratados = df_posicion["Candidatos contratados"].sum() or 0
-            
-                descartados_cliente = total_ternados - total_contratados
-                porcentaje_descartados = (descartados_cliente / total_ternados * 100) if total_ternados > 0 else 0
-            
-                labels = ['Contratados', 'Descartados por Cliente']
-                sizes = [total_contratados, descartados_cliente]
-                colors = ['#4CAF50', '#FF7043']
-            
-                fig, ax = plt.subplots(figsize=(8, 4.5))
-                ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors)
-                ax.axis('equal')
-                plt.tight_layout(pad=2.0)
-                st.pyplot(fig)
-
-            with flujo_diario:
-                st.markdown("### Flujo diario de candidatos")
-                by_date = df_filtrado.groupby("Fecha")[["Recruitment. Candidatos nuevos", "Recruitment. Candidatos Viables", "Candidatos contratados"]].sum()
-                if not by_date.empty:
-                    fig6, ax6 = plt.subplots(figsize=(12, 4.5))
-                    by_date.plot(ax=ax6)
-                    ax6.set_title("Flujo diario de candidatos")
-                    ax6.set_xlabel("Fecha")
-                    ax6.set_ylabel("Cantidad")
-                    ax6.grid(True)
-                    st.pyplot(fig6)
-                    plt.tight_layout(pad=2.0)
-
-            tendencias, embudo, conversion = st.columns(3)
-            with tendencias:
-                st.markdown("### Tendencia diaria por fuente vs. metas")
-
-                daily = df_filtrado.groupby("Fecha")[["Recruitment. Candidatos Indeed", "Recruitment. Busqueda directa"]].sum()
-                daily = daily.sort_index()
-                fechas = daily.index
-                num_dias = len(fechas)
-
-                # Metas por día (ajustadas por acumulación)
-                meta_diaria = {
-                    "Recruitment. Candidatos Indeed": 10,
-                    "Recruitment. Busqueda directa": 2
-                }
-
-                metas_acumuladas = {
-                    "Recruitment. Candidatos Indeed": [meta_diaria["Recruitment. Candidatos Indeed"] * (i+1) for i in range(num_dias)],
-                    "Recruitment. Busqueda directa": [meta_diaria["Recruitment. Busqueda directa"] * (i+1) for i in range(num_dias)]
-                }
-
-                fig, ax = plt.subplots(figsize=(8, 4.5))
-
-                x = np.arange(num_dias)
-
-                # Barras apiladas
-                bar1 = ax.bar(x, daily["Recruitment. Candidatos Indeed"], label="Recruitment. Candidatos Indeed", color="#42A5F5")
-                bar2 = ax.bar(x, daily["Recruitment. Busqueda directa"], bottom=daily["Recruitment. Candidatos Indeed"], label="Recruitment. Busqueda directa", color="#66BB6A")
-
-                # Líneas de metas
-                ax.plot(x, metas_acumuladas["Recruitment. Candidatos Indeed"], color="#FF7043", linestyle="--", linewidth=2.5, marker='o', markersize=4, label="Meta Indeed")
-                ax.plot(x, metas_acumuladas["Recruitment. Busqueda directa"], color="#AB47BC", linestyle="--", linewidth=2.5, marker='o', markersize=4, label="Meta Búsqueda directa")
-
-                # Etiquetas
-                for i, total in enumerate(daily.sum(axis=1)):
-                    ax.text(i, total + 2, str(int(total)), ha='center', fontsize=9, weight='bold')
-
-                ax.set_xticks(x)
-                ax.set_xticklabels([fecha.strftime("%Y-%m-%d") for fecha in fechas], rotation=45)
-                ax.set_ylabel("Candidatos")
-                ax.set_xlabel("Fecha")
-                ax.set_title("Tendencia diaria por fuente vs. metas", fontsize=14, weight="bold")
-                ax.legend()
-                ax.grid(axis='y', linestyle=':', alpha=0.6)
-                plt.tight_layout(pad=2.0)
-
-                st.pyplot(fig)
-
-            with embudo:
-                st.markdown("### Embudo de Reclutamiento")
-                # Primero tomamos el último registro de cada posición
-                ultimos_por_posicion = df_filtrado.loc[df_filtrado.groupby("Posicion")["Fecha"].idxmax()]
-
-                # Luego sumamos los valores globales de esos últimos registros
-                funnel_data = {
-                    "Indeed": ultimos_por_posicion.get("Recruitment. Candidatos Indeed", pd.Series([0])).sum(),
-                    "RCRM": ultimos_por_posicion.get("Recruitment. Candidatos R.CRM", pd.Series([0])).sum(),
-                    "Viables": ultimos_por_posicion.get("Recruitment. Candidatos Viables", pd.Series([0])).sum(),
-                    "Contratados": ultimos_por_posicion.get("Candidatos contratados", pd.Series([0])).sum()
-                }
-
-                # Graficamos como antes
-                fig2, ax2 = plt.subplots(figsize=(8, 4.5))
-                ax2.barh(list(funnel_data.keys())[::-1], list(funnel_data.values())[::-1], color="#4C72B0")
-                ax2.set_title("Embudo de Reclutamiento (última actualización por posición)")
-                ax2.set_xlabel("Cantidad de Candidatos")
-                plt.tight_layout(pad=2.0)
-                st.pyplot(fig2)
-         
-
-            with conversion:
-                st.markdown("### Conversión de Viables a Contratados")
-                by_vacancy = df.groupby("Posicion")[["Recruitment. Candidatos nuevos", "Recruitment. Candidatos Viables", "Candidatos contratados"]].sum()
-                if not by_vacancy.empty:
-                    conversion = (by_vacancy["Candidatos contratados"] / by_vacancy["Recruitment. Candidatos Viables"]).fillna(0) * 100
-                    conversion = conversion[conversion > 0]
-                    if not conversion.empty:
-                        fig5, ax5 = plt.subplots(figsize=(8,4.5))
-                        ax5.barh(conversion.index, conversion.values, color="#C44E52")
-                        ax5.set_title("Tasa de Conversión de Viables a Contratados")
-                        ax5.set_xlabel("% Conversión")
-                        plt.tight_layout(pad=2.0)
-                        st.pyplot(fig5)       
-
-        elif pagina == "Posiciones cerradas":
-            
-            t_cerrado, conversion, descarte = st.columns(3)
-            with t_cerrado:
-                # Normalizamos y preparamos datos
-                df["¿Posicion abierta?"] = df["¿Posicion abierta?"].astype(str).str.lower().str.strip()
-                df["Nombre reclutador"] = df["Nombre reclutador"].astype(str).str.strip()
-                df["Posicion"] = df["Posicion"].astype(str).str.strip()
-                df = df.dropna(subset=["Fecha"])
-                df["Fecha"] = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
-            
-                # Tomamos el último registro por posición
-                ultimos = df.loc[df.groupby("Posicion")["Fecha"].idxmax()]
-            
-                # Solo posiciones cerradas
-                cerradas = ultimos[ultimos["¿Posicion abierta?"] == "no"]
-            
-                # Obtenemos fecha de apertura para cada posición
-                fechas_apertura = df.groupby("Posicion")["Fecha"].min().reset_index().rename(columns={"Fecha": "Fecha_apertura"})
-                hoy = pd.Timestamp.today().normalize()
-                fechas_apertura["Dias_habiles_abierta"] = fechas_apertura["Fecha_apertura"].apply(
-                    lambda apertura: np.busday_count(apertura.date(), hoy.date())
-                )
-            
-                # Mergeamos para tener apertura y cierre
-                cerradas = cerradas.merge(fechas_apertura, on="Posicion")
-                cerradas["Dias_para_cerrar"] = (cerradas["Fecha"] - cerradas["Fecha_apertura"]).dt.days
-            
-                # Mostramos tabla de tiempos de cierre
-                st.markdown("### Tiempo de cierre por posición")
-                st.dataframe(cerradas[["Posicion", "Nombre reclutador", "Fecha_apertura", "Fecha", "Dias_para_cerrar"]], use_container_width=True)
-
-            with conversion:
-                # Conversiones sobre las posiciones cerradas
-                posiciones_cerradas = cerradas["Posicion"].tolist()
-                df_cerradas = df[df["Posicion"].isin(posiciones_cerradas)]
-            
-                st.markdown("### Conversión en posiciones cerradas")
-                conversion_data = df_cerradas.groupby("Posicion")[["Recruitment. Candidatos Viables", "Candidatos contratados"]].sum()
-            
-                if not conversion_data.empty:
-                    conversion_data["Conversion"] = (conversion_data["Candidatos contratados"] / conversion_data["Recruitment. Candidatos Viables"]).fillna(0) * 100
-                    conversion_data = conversion_data.sort_values("Conversion", ascending=False)
-            
-                    fig, ax = plt.subplots(figsize=(10, 5))
-                    ax.barh(conversion_data.index, conversion_data["Conversion"], color="#4CAF50")
-                    ax.set_xlabel("% de Conversión")
-                    ax.set_title("Conversión por posición cerrada")
-                    st.pyplot(fig)
-                else:
-                    st.info("No hay datos suficientes para calcular la conversión.")
-            with descarte:
-                # Descarte por reclutador (solo cerradas)
-                st.markdown("### Descarte por reclutador (solo posiciones cerradas)")
-                descarte_por_reclutador = df_cerradas.groupby("Nombre reclutador")[[
-                    "Screening. CNV. Perfil no calificado (hard skills)",
-                    "Screening. CNV. Soft Skills",
-                    "Screening. CNV. Fuera de presupuesto",
-                    "Screening. CNV. Nivel de ingles",
-                    "Screening. CNV. No se presento / Inpuntual",
-                    "Screening. CNV. Localidad"
-                ]].sum()
-            
-                if not descarte_por_reclutador.empty:
-                    fig, ax = plt.subplots(figsize=(12, 6))
-                    descarte_por_reclutador.plot(kind='bar', stacked=True, ax=ax)
-                    ax.set_ylabel("Cantidad de descartes")
-                    ax.set_title("Razones de descarte por reclutador")
-                    plt.xticks(rotation=45)
-                    st.pyplot(fig)
-                else:
-                    st.info("No hay datos de descartes en posiciones cerradas.")
+            pagina = st.selectbox("Selecciona vista", grafo.vistas())
+
+        # Solo se calcula lo que necesita la vista seleccionada
+        grafo.ejecutar(pagina, {
+            "df": df,
+            "version": version,
+            "contador": contador,
+            "indice_carga": obtener_indice_carga(fuentes),
+            "indice_tiempos": obtener_indice_tiempos(fuentes),
+            "tablas": tablas,
+            "posicion_sel": posicion_sel,
+            "periodo": periodo,
+            "fecha_max": fecha_max,
+            "graficas_interactivas": graficas_interactivas,
+        })
 
     
     except Exception as e:
         st.error(f"Error al cargar o procesar el archivo: {e}")
+
+# Filas descartadas, vacíos y valores no numéricos de la última carga del Sheet
+if fuentes:
+    publicacion = obtener_publicaciones().actual()
+    if publicacion and publicacion.get("calidad"):
+        with st.sidebar.expander("Calidad de datos"):
+            st.dataframe(resumen_calidad(publicacion["calidad"]), use_container_width=True, hide_index=True)
+
+# Panel con lo que tardó cada etapa de este rerun
+if instrumentacion is not None:
+    with st.sidebar.expander("Instrumentación"):
+        st.dataframe(instrumentacion.resumen(), use_container_width=True)
+        refrescador = obtener_refrescador(fuentes) if fuentes and os.environ.get("REFRESCADOR_EXTERNO", "0") != "1" else None
+        if refrescador is not None and refrescador.medicion is not None:
+            st.markdown("Último refresco en segundo plano")
+            st.dataframe(refrescador.medicion, use_container_width=True)
+terminar(pagina=pagina)
@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# Días de descanso obligatorio de la Ley Federal del Trabajo (art. 74)
+def festivos_mexico(anios):
+    festivos = []
+    for anio in anios:
+        festivos += [
+            np.datetime64(f"{anio}-01-01"),                                      # Año nuevo
+            np.busday_offset(f"{anio}-02", 0, roll="forward", weekmask="Mon"),   # Constitución
+            np.busday_offset(f"{anio}-03", 2, roll="forward", weekmask="Mon"),   # Natalicio de Benito Juárez
+            np.datetime64(f"{anio}-05-01"),                                      # Día del trabajo
+            np.datetime64(f"{anio}-09-16"),                                      # Independencia
+            np.busday_offset(f"{anio}-11", 2, roll="forward", weekmask="Mon"),   # Revolución
+            np.datetime64(f"{anio}-12-25"),                                      # Navidad
+        ]
+        if (anio - 2024) % 6 == 0:
+            festivos.append(np.datetime64(f"{anio}-10-01"))                      # Transmisión del Poder Ejecutivo
+    return np.array(festivos, dtype="datetime64[D]")
+
+
+def calendario_mexico(anios=None):
+    if anios is None:
+        anio_actual = pd.Timestamp.today().year
+        anios = range(anio_actual - 5, anio_actual + 2)
+    return np.busdaycalendar(holidays=festivos_mexico(anios))
+
+
+# Cuenta días hábiles entre dos columnas de fechas con una sola llamada a
+# np.busday_count. Los pares (inicio, fin) ya calculados se guardan como
+# arreglos ordenados y se buscan con searchsorted, sin bucles en Python.
+# El contador se comparte entre sesiones e hilos: las claves y sus valores
+# viven juntos en una tupla inmutable que cada llamada lee una sola vez, y
+# las escrituras se hacen con un lock y reemplazan la tupla completa.
+class ContadorDiasHabiles:
+
+    def __init__(self, calendario=None, max_entradas=500_000):
+        self.calendario = calendario if calendario is not None else np.busdaycalendar()
+        self.max_entradas = max_entradas
+        self._tabla = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self._lock = threading.Lock()
+
+    def contar(self, inicio, fin):
+        inicio, fin = np.broadcast_arrays(_a_dias(inicio), _a_dias(fin))
+        if inicio.size == 0:
+            return np.empty(inicio.shape, dtype=np.int64)
+
+        claves = _claves_de_pares(inicio, fin)
+        unicas, inversa = np.unique(claves, return_inverse=True)
+
+        valores = np.empty(len(unicas), dtype=np.int64)
+        encontradas = np.zeros(len(unicas), dtype=bool)
+        guardadas, guardados = self._tabla
+        if len(guardadas):
+            pos = np.minimum(np.searchsorted(guardadas, unicas), len(guardadas) - 1)
+            encontradas = guardadas[pos] == unicas
+            valores[encontradas] = guardados[pos[encontradas]]
+
+        faltantes = ~encontradas
+        if faltantes.any():
+            a_inicio = (unicas[faltantes] >> 32).astype("datetime64[D]")
+            a_fin = (unicas[faltantes] & 0xFFFFFFFF).astype(np.int32).astype(np.int64).astype("datetime64[D]")
+            valores[faltantes] = np.busday_count(a_inicio, a_fin, busdaycal=self.calendario)
+            self._guardar(unicas[faltantes], valores[faltantes])
+
+        return valores[inversa].reshape(inicio.shape)
+
+    def _guardar(self, claves, valores):
+        with self._lock:
+            guardadas, guardados = self._tabla
+            if len(guardadas) + len(claves) > self.max_entradas:
+                # Caché llena: empezamos de nuevo en lugar de crecer sin límite
+                guardadas, guardados = guardadas[:0], guardados[:0]
+            # Otro hilo pudo haber guardado algunas de estas claves mientras se calculaban
+            claves = np.concatenate([guardadas, claves])
+            valores = np.concatenate([guardados, valores])
+            claves, primeras = np.unique(claves, return_index=True)
+            self._tabla = (claves, valores[primeras])
+
+
+def _a_dias(valor):
+    if isinstance(valor, (pd.Series, pd.Index)):
+        valor = valor.to_numpy()
+    elif isinstance(valor, pd.Timestamp):
+        valor = valor.to_datetime64()
+    return np.asarray(valor, dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+# Un par (inicio, fin) se codifica en un solo int64: 32 bits para cada fecha
+def _claves_de_pares(inicio, fin):
+    a = inicio.astype(np.int64).ravel()
+    b = fin.astype(np.int64).ravel()
+    return (a << 32) | (b & 0xFFFFFFFF)
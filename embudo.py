@@ -0,0 +1,101 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from cubo import COLUMNAS_CUBO, rangos_por_posicion
+from limpieza import ESQUEMA
+
+
+# Etapas del embudo y razones de descarte como se muestran en las gráficas
+ETAPAS_EMBUDO = {
+    "Indeed": "Recruitment. Candidatos Indeed",
+    "RCRM": "Recruitment. Candidatos R.CRM",
+    "Viables": "Recruitment. Candidatos Viables",
+    "Contratados": "Candidatos contratados",
+}
+RAZONES_DESCARTE = {
+    "Hard Skills": "Screening. CNV. Perfil no calificado (hard skills)",
+    "Fuera de presupuesto": "Screening. CNV. Fuera de presupuesto",
+    "Soft Skills": "Screening. CNV. Soft Skills",
+    "Inglés": "Screening. CNV. Nivel de ingles",
+    "No se presentó": "Screening. CNV. No se presento / Inpuntual",
+    "Localidad": "Screening. CNV. Localidad",
+}
+
+_LLAVES = ["Posicion", "Nombre reclutador", "Fecha"]
+
+
+# Agregado del embudo, los descartes y la conversión. Un solo groupby sobre
+# (Posicion, Nombre reclutador, Fecha) saca las sumas de todas las columnas y
+# el primer registro de cada grupo; las vistas responden desde esa tabla, que
+# tiene un renglón por día y reclutador de cada posición, sin volver al df.
+# Las columnas que no vengan en el Sheet quedan en 0 con su tipo del ESQUEMA.
+class AgregadoEmbudo:
+
+    def __init__(self, df, columnas=COLUMNAS_CUBO):
+        self.columnas = list(columnas)
+        presentes = [columna for columna in self.columnas if columna in df.columns]
+        etapas = [columna for columna in ETAPAS_EMBUDO.values() if columna in df.columns]
+
+        # "Fila" es la posición original, para desempatar el último registro igual que idxmax
+        datos = df[_LLAVES + presentes].assign(Fila=np.arange(len(df)))
+        grupos = datos.groupby(_LLAVES, observed=True, sort=True, dropna=False)
+        self.sumas = _completar(grupos[presentes].sum(), self.columnas)
+        self._primeros = _completar(grupos[etapas + ["Fila"]].first(), list(ETAPAS_EMBUDO.values()) + ["Fila"])
+        # El groupby deja cada posición en un bloque contiguo: el embudo de una
+        # posición solo recorre sus renglones
+        self._rangos = rangos_por_posicion(self._primeros.index)
+
+    # Sumas de todas las columnas, de una posición o de todas
+    def totales(self, posicion="Todas"):
+        if posicion == "Todas":
+            return self.sumas.sum()
+        por_posicion = self.por_posicion()
+        if posicion not in por_posicion.index:
+            return pd.Series(0, index=self.columnas)
+        return por_posicion.loc[posicion, self.columnas]
+
+    # Sumas por posición y su tasa de conversión de viables a contratados
+    def por_posicion(self, posiciones=None):
+        tabla = self._por_posicion
+        if posiciones is None:
+            return tabla
+        return tabla[tabla.index.isin(posiciones)]
+
+    # Sumas por reclutador de las posiciones indicadas
+    def por_reclutador(self, posiciones):
+        sumas = self.sumas
+        return sumas[sumas.index.get_level_values("Posicion").isin(posiciones)].groupby(
+            level="Nombre reclutador", observed=True
+        ).sum()
+
+    # Etapas del embudo sumando el último registro de cada posición en [inicio, fin]
+    def embudo(self, inicio=None, fin=None, posicion="Todas"):
+        primeros = self._primeros
+        if posicion != "Todas":
+            desde, hasta = self._rangos.get(posicion, (0, 0))
+            primeros = primeros.iloc[desde:hasta]
+        incluir = np.ones(len(primeros), dtype=bool)
+        fechas = primeros.index.get_level_values("Fecha")
+        if inicio is not None:
+            incluir &= fechas >= pd.Timestamp(inicio)
+        if fin is not None:
+            incluir &= fechas <= pd.Timestamp(fin)
+
+        ventana = primeros[incluir].reset_index().sort_values("Fila")
+        ultimos = ventana.loc[ventana.groupby("Posicion", observed=True)["Fecha"].idxmax()]
+        return pd.Series({etapa: ultimos[columna].sum() for etapa, columna in ETAPAS_EMBUDO.items()})
+
+    @cached_property
+    def _por_posicion(self):
+        tabla = self.sumas.groupby(level="Posicion", observed=True).sum()
+        tabla["Conversion"] = (tabla["Candidatos contratados"] / tabla["Recruitment. Candidatos Viables"]).fillna(0) * 100
+        return tabla
+
+
+def _completar(tabla, columnas):
+    faltantes = [columna for columna in columnas if columna not in tabla.columns]
+    for columna in faltantes:
+        tabla[columna] = np.zeros(len(tabla), dtype=ESQUEMA.get(columna, "int64"))
+    return tabla[columnas]
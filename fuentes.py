@@ -0,0 +1,90 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from limpieza import unir_bloques
+
+
+# Registro de Sheets a cargar: una pestaña (gid) por cliente o unidad de negocio.
+# Se puede reemplazar con un fuentes.json (o la ruta en FUENTES_SHEETS) con la
+# misma forma: [{"nombre": ..., "url": ..., "timeout": ..., "reintentos": ...}]
+FUENTES = [
+    {
+        "nombre": "Principal",
+        "url": "https://docs.google.com/spreadsheets/d/18uRbFCZ3btmnLxsfePyJ0_JURaxARa0hZl1ZbM9EQIY/export?format=csv&gid=1933021086",
+        "timeout": 10,
+        "reintentos": 2,
+    },
+]
+
+
+def cargar_registro(ruta=None):
+    ruta = ruta or os.environ.get("FUENTES_SHEETS", "fuentes.json")
+    if not os.path.exists(ruta):
+        return FUENTES
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Sesión compartida con un pool de conexiones del tamaño del registro, para
+# que obtener_fuentes no espere ni descarte conexiones con un hilo por fuente
+def crear_sesion(fuentes):
+    conexiones = max(len(fuentes), 1)
+    session = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones)
+    session.mount("https://", adaptador)
+    session.mount("http://", adaptador)
+    return session
+
+
+# Pide todas las fuentes al cargador en paralelo; la espera total es la de la
+# fuente más lenta. Devuelve (fuente, entrada, error) en el orden del registro.
+def obtener_fuentes(cargador, fuentes):
+    for fuente in fuentes:
+        cargador.configurar(fuente["url"], timeout=fuente.get("timeout"), reintentos=fuente.get("reintentos"))
+
+    def obtener(fuente):
+        try:
+            return fuente, cargador.refrescar(fuente["url"]), None
+        except Exception as e:
+            return fuente, None, e
+
+    with ThreadPoolExecutor(max_workers=max(len(fuentes), 1)) as pool:
+        return list(pool.map(obtener, fuentes))
+
+
+# Posiciones cuyo nombre aparece en más de una fuente. Todos los cálculos
+# agrupan por Posicion, así que esas se renombran a "Posicion (Fuente)" para
+# no mezclar posiciones distintas de dos pestañas.
+def posiciones_repetidas(frames_por_fuente):
+    vistas = {}
+    for nombre, df in frames_por_fuente:
+        for posicion in df["Posicion"].dropna().unique():
+            vistas.setdefault(posicion, set()).add(nombre)
+    return {posicion for posicion, nombres in vistas.items() if len(nombres) > 1}
+
+
+def renombrar_repetidas(df, nombre, repetidas):
+    if not repetidas:
+        return df
+    df = df.copy()
+    df["Posicion"] = df["Posicion"].astype("category").cat.rename_categories(
+        lambda posicion: f"{posicion} ({nombre})" if posicion in repetidas else posicion
+    )
+    return df
+
+
+# Une los DataFrames limpios de cada fuente agregando la columna "Fuente"
+def concatenar_fuentes(frames_por_fuente):
+    repetidas = posiciones_repetidas(frames_por_fuente)
+    frames = []
+    for nombre, df in frames_por_fuente:
+        df = renombrar_repetidas(df, nombre, repetidas) if repetidas else df.copy()
+        df["Fuente"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[nombre])
+        frames.append(df)
+    return unir_bloques(frames).reset_index(drop=True)
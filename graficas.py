@@ -0,0 +1,319 @@
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from embudo import RAZONES_DESCARTE
+
+
+# Las gráficas se construyen con Figure directamente (sin pyplot), así no
+# quedan registradas en el estado global de matplotlib entre reruns. Cada
+# función recibe los datos de la vista y devuelve la figura, o None si no
+# hay nada que graficar.
+
+def color_por_carga(valores):
+    valores = np.asarray(valores)
+    return np.select([valores > 5, valores >= 3], ["#EF5350", "#FFEE58"], default="#66BB6A")
+
+
+# --- Resumen General ---
+def grafica_carga_reclutador(resumen_completo):
+    fig = Figure(figsize=(5, 3))
+    ax = fig.subplots()
+    colores = color_por_carga(resumen_completo["Posiciones abiertas"])
+    ax.bar(resumen_completo["Nombre reclutador"], resumen_completo["Posiciones abiertas"], color=colores)
+    ax.set_ylabel("Posiciones abiertas")
+    ax.set_xlabel("Reclutador")
+    ax.grid(True)
+    ax.tick_params(axis="x", labelrotation=45)
+    return fig
+
+
+# Un solo scatter para todas las posiciones: el eje y usa el código de la
+# posición y el color sale del ciclo de colores de matplotlib
+def grafica_ternas(ternas_df):
+    codigos, posiciones = pd.factorize(ternas_df["Posicion"])
+    ciclo = np.array(matplotlib.rcParams["axes.prop_cycle"].by_key()["color"])
+
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.scatter(
+        ternas_df["Dias_habiles"],
+        codigos,
+        s=ternas_df["Terna"] * 50,  # Tamaño proporcional al número de candidatos
+        c=ciclo[codigos % len(ciclo)],
+        alpha=0.7
+    )
+    ax.set_yticks(np.arange(len(posiciones)))
+    ax.set_yticklabels(list(posiciones))
+    ax.set_xlabel("Días hábiles desde apertura")
+    ax.set_ylabel("Posición")
+    ax.grid(True)
+    return fig
+
+
+# Versión interactiva con Altair/Vega: el navegador dibuja los puntos
+def grafica_ternas_interactiva(ternas_df):
+    import altair as alt
+
+    datos = ternas_df[["Posicion", "Reclutador", "Fecha", "Dias_habiles", "Terna"]].astype({"Posicion": str, "Reclutador": str})
+    return alt.Chart(datos).mark_circle(opacity=0.7).encode(
+        x=alt.X("Dias_habiles:Q", title="Días hábiles desde apertura"),
+        y=alt.Y("Posicion:N", title="Posición", sort=None),
+        size=alt.Size("Terna:Q", legend=None),
+        color=alt.Color("Posicion:N", legend=None),
+        tooltip=["Posicion", "Reclutador", alt.Tooltip("Fecha:T", format="%Y-%m-%d"), "Dias_habiles", "Terna"],
+    ).interactive()
+
+
+# --- Evaluación y Conversión ---
+# Las gráficas de embudo, descarte y conversión reciben las sumas ya agregadas
+# en una sola pasada (ver embudo.py)
+def grafica_descarte_reclutadores(totales):
+    etapa2 = {razon: totales[columna] for razon, columna in RAZONES_DESCARTE.items()}
+    etapa2 = {k: v for k, v in etapa2.items() if v > 0}
+    if not etapa2:
+        return None
+    fig = Figure(figsize=(8, 4.5))
+    ax = fig.subplots()
+    ax.pie(etapa2.values(), labels=etapa2.keys(), autopct='%1.1f%%', startangle=140, colors=matplotlib.colormaps['Pastel1'].colors)
+    ax.axis('equal')
+    return fig
+
+
+# Recibe las sumas de la posición seleccionada (nodo totales_posicion); el
+# resumen de ternas tiene un renglón por posición y se filtra aquí
+def grafica_descarte_cliente(totales_posicion, resumen_ternas, posicion):
+    if posicion == "Todas":
+        resumen_ternas_posicion = resumen_ternas
+    else:
+        resumen_ternas_posicion = resumen_ternas[resumen_ternas["Posicion"] == posicion]
+
+    total_ternados = resumen_ternas_posicion["Total candidatos enviados"].sum() or 0
+    total_contratados = totales_posicion["Candidatos contratados"] or 0
+    descartados_cliente = total_ternados - total_contratados
+
+    labels = ['Contratados', 'Descartados por Cliente']
+    sizes = [total_contratados, descartados_cliente]
+    colors = ['#4CAF50', '#FF7043']
+
+    fig = Figure(figsize=(8, 4.5))
+    ax = fig.subplots()
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors)
+    ax.axis('equal')
+    fig.tight_layout(pad=2.0)
+    return fig
+
+
+# Las gráficas de flujo reciben las sumas por día ya agregadas (ver cubo.py)
+def grafica_flujo_diario(diario):
+    by_date = diario[["Recruitment. Candidatos nuevos", "Recruitment. Candidatos Viables", "Candidatos contratados"]]
+    if by_date.empty:
+        return None
+    fig = Figure(figsize=(12, 4.5))
+    ax = fig.subplots()
+    by_date.plot(ax=ax)
+    ax.set_title("Flujo diario de candidatos")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Cantidad")
+    ax.grid(True)
+    return fig
+
+
+def grafica_tendencias(diario):
+    daily = diario[["Recruitment. Candidatos Indeed", "Recruitment. Busqueda directa"]]
+    fechas = daily.index
+    num_dias = len(fechas)
+
+    # Metas por día (ajustadas por acumulación)
+    meta_diaria = {
+        "Recruitment. Candidatos Indeed": 10,
+        "Recruitment. Busqueda directa": 2
+    }
+
+    x = np.arange(num_dias)
+
+    metas_acumuladas = {
+        "Recruitment. Candidatos Indeed": meta_diaria["Recruitment. Candidatos Indeed"] * (x + 1),
+        "Recruitment. Busqueda directa": meta_diaria["Recruitment. Busqueda directa"] * (x + 1)
+    }
+
+    fig = Figure(figsize=(8, 4.5))
+    ax = fig.subplots()
+
+    # Barras apiladas
+    ax.bar(x, daily["Recruitment. Candidatos Indeed"], label="Recruitment. Candidatos Indeed", color="#42A5F5")
+    ax.bar(x, daily["Recruitment. Busqueda directa"], bottom=daily["Recruitment. Candidatos Indeed"], label="Recruitment. Busqueda directa", color="#66BB6A")
+
+    # Líneas de metas
+    ax.plot(x, metas_acumuladas["Recruitment. Candidatos Indeed"], color="#FF7043", linestyle="--", linewidth=2.5, marker='o', markersize=4, label="Meta Indeed")
+    ax.plot(x, metas_acumuladas["Recruitment. Busqueda directa"], color="#AB47BC", linestyle="--", linewidth=2.5, marker='o', markersize=4, label="Meta Búsqueda directa")
+
+    # Etiquetas
+    for i, total in enumerate(daily.sum(axis=1)):
+        ax.text(i, total + 2, str(int(total)), ha='center', fontsize=9, weight='bold')
+
+    ax.set_xticks(x)
+    ax.set_xticklabels([fecha.strftime("%Y-%m-%d") for fecha in fechas], rotation=45)
+    ax.set_ylabel("Candidatos")
+    ax.set_xlabel("Fecha")
+    ax.set_title("Tendencia diaria por fuente vs. metas", fontsize=14, weight="bold")
+    ax.legend()
+    ax.grid(axis='y', linestyle=':', alpha=0.6)
+    fig.tight_layout(pad=2.0)
+    return fig
+
+
+# Etapas sumadas sobre el último registro de cada posición
+def grafica_embudo(embudo):
+    fig = Figure(figsize=(8, 4.5))
+    ax = fig.subplots()
+    ax.barh(list(embudo.index)[::-1], list(embudo.values)[::-1], color="#4C72B0")
+    ax.set_title("Embudo de Reclutamiento (última actualización por posición)")
+    ax.set_xlabel("Cantidad de Candidatos")
+    fig.tight_layout(pad=2.0)
+    return fig
+
+
+def grafica_conversion(por_posicion):
+    if por_posicion.empty:
+        return None
+    conversion = por_posicion["Conversion"]
+    conversion = conversion[conversion > 0]
+    if conversion.empty:
+        return None
+    fig = Figure(figsize=(8, 4.5))
+    ax = fig.subplots()
+    ax.barh(conversion.index, conversion.values, color="#C44E52")
+    ax.set_title("Tasa de Conversión de Viables a Contratados")
+    ax.set_xlabel("% Conversión")
+    fig.tight_layout(pad=2.0)
+    return fig
+
+
+# --- Posiciones cerradas ---
+def grafica_conversion_cerradas(conversion_cerradas):
+    if conversion_cerradas.empty:
+        return None
+    conversion_data = conversion_cerradas[["Recruitment. Candidatos Viables", "Candidatos contratados", "Conversion"]]
+    conversion_data = conversion_data.sort_values("Conversion", ascending=False)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.barh(conversion_data.index, conversion_data["Conversion"], color="#4CAF50")
+    ax.set_xlabel("% de Conversión")
+    ax.set_title("Conversión por posición cerrada")
+    return fig
+
+
+def grafica_descarte_cerradas(descarte_cerradas):
+    descarte_por_reclutador = descarte_cerradas[[
+        "Screening. CNV. Perfil no calificado (hard skills)",
+        "Screening. CNV. Soft Skills",
+        "Screening. CNV. Fuera de presupuesto",
+        "Screening. CNV. Nivel de ingles",
+        "Screening. CNV. No se presento / Inpuntual",
+        "Screening. CNV. Localidad"
+    ]]
+    if descarte_por_reclutador.empty:
+        return None
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    descarte_por_reclutador.plot(kind='bar', stacked=True, ax=ax)
+    ax.set_ylabel("Cantidad de descartes")
+    ax.set_title("Razones de descarte por reclutador")
+    ax.tick_params(axis="x", labelrotation=45)
+    return fig
+
+
+# --- Tiempos de respuesta ---
+# Una gráfica por métrica con la p50 y la p90 móviles de cada mes
+def grafica_percentiles(percentiles):
+    if percentiles.empty:
+        return None
+    metricas = list(percentiles["Metrica"].unique())
+    fig = Figure(figsize=(5 * len(metricas), 4))
+    ejes = fig.subplots(1, len(metricas), squeeze=False)[0]
+    for ax, metrica in zip(ejes, metricas):
+        datos = percentiles[percentiles["Metrica"] == metrica]
+        ax.plot(datos["Mes"], datos["p50"], marker="o", color="#42A5F5", label="p50")
+        ax.plot(datos["Mes"], datos["p90"], marker="o", color="#EF5350", linestyle="--", label="p90")
+        ax.set_title(metrica)
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.grid(True)
+        ax.legend()
+    fig.tight_layout(pad=2.0)
+    return fig
+
+
+# Gráficas de cada vista con su título y los nodos de calculos.py que reciben
+GRAFICAS_POR_VISTA = {
+    "Resumen General": [
+        ("Carga laboral por reclutador", grafica_carga_reclutador, ("carga_reclutador",)),
+        ("Envío de ternas por posición", grafica_ternas, ("ternas_largo",)),
+    ],
+    "Evaluación y Conversión": [
+        ("Descarte por reclutadores", grafica_descarte_reclutadores, ("totales",)),
+        ("Descarte por cliente", grafica_descarte_cliente, ("totales_posicion", "resumen_ternas", "posicion_sel")),
+        ("Flujo diario de candidatos", grafica_flujo_diario, ("diario",)),
+        ("Tendencia diaria por fuente vs. metas", grafica_tendencias, ("diario",)),
+        ("Embudo de Reclutamiento", grafica_embudo, ("embudo",)),
+        ("Conversión de Viables a Contratados", grafica_conversion, ("conversion",)),
+    ],
+    "Posiciones cerradas": [
+        ("Conversión en posiciones cerradas", grafica_conversion_cerradas, ("conversion_cerradas",)),
+        ("Descarte por reclutador (solo posiciones cerradas)", grafica_descarte_cerradas, ("descarte_cerradas",)),
+    ],
+    "Tiempos de respuesta": [
+        ("p50 y p90 móviles de 3 meses", grafica_percentiles, ("percentiles_mes",)),
+    ],
+}
+
+
+# --- Render y caché de imágenes ---
+
+# Convierte la figura a bytes (PNG o SVG) y la libera de inmediato
+def renderizar(fig, formato="png", dpi=200):
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+
+# Imágenes ya renderizadas, indexadas por (tipo de gráfica, filtros, versión
+# del dataset). Se desalojan las menos usadas cuando se pasa del presupuesto.
+class CacheGraficas:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, formato="png"):
+        self.max_bytes = max_bytes
+        self.formato = formato
+        self._imagenes = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, construir, *args):
+        with self._lock:
+            datos = self._imagenes.get(clave)
+            if datos is not None:
+                self._imagenes.move_to_end(clave)
+                return datos
+
+        fig = construir(*args)
+        if fig is None:
+            return None
+        datos = renderizar(fig, self.formato)
+
+        with self._lock:
+            if clave not in self._imagenes:
+                self._imagenes[clave] = datos
+                self._total_bytes += len(datos)
+            while self._total_bytes > self.max_bytes and len(self._imagenes) > 1:
+                _, viejos = self._imagenes.popitem(last=False)
+                self._total_bytes -= len(viejos)
+        return datos
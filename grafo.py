@@ -0,0 +1,62 @@
+import pandas as pd
+
+from instrumentacion import etapa
+
+
+# Grafo de dependencias perezoso. Cada nodo declara las entradas que necesita
+# (otros nodos o valores base como el DataFrame o los filtros) y solo se calcula
+# cuando una vista lo pide, directa o indirectamente. Dentro de una ejecución
+# cada nodo se calcula a lo más una vez.
+class GrafoPerezoso:
+
+    def __init__(self):
+        self._nodos = {}
+        self._vistas = {}
+
+    def nodo(self, nombre, entradas=()):
+        def registrar(funcion):
+            self._nodos[nombre] = (funcion, tuple(entradas))
+            return funcion
+        return registrar
+
+    def vista(self, nombre, entradas=()):
+        def registrar(funcion):
+            self._vistas[nombre] = (funcion, tuple(entradas))
+            return funcion
+        return registrar
+
+    def vistas(self):
+        return list(self._vistas)
+
+    # Nodos que cambian cuando cambia un valor base (directa o indirectamente)
+    def dependientes(self, nombre):
+        dependientes = set()
+        cambio = True
+        while cambio:
+            cambio = False
+            for nodo, (_, entradas) in self._nodos.items():
+                if nodo not in dependientes and any(e == nombre or e in dependientes for e in entradas):
+                    dependientes.add(nodo)
+                    cambio = True
+        return dependientes
+
+    # `valores` trae los valores base; ahí mismo se guardan los nodos calculados
+    def evaluar(self, nombre, valores, _en_curso=()):
+        if nombre in valores:
+            return valores[nombre]
+        if nombre not in self._nodos:
+            raise KeyError(f"No hay un nodo ni un valor llamado '{nombre}'")
+        if nombre in _en_curso:
+            raise ValueError(f"Dependencia circular en el nodo '{nombre}'")
+        funcion, entradas = self._nodos[nombre]
+        en_curso = _en_curso + (nombre,)
+        argumentos = [self.evaluar(entrada, valores, en_curso) for entrada in entradas]
+        with etapa(f"nodo: {nombre}") as registro:
+            valores[nombre] = funcion(*argumentos)
+            if isinstance(valores[nombre], (pd.DataFrame, pd.Series)):
+                registro["filas"] = len(valores[nombre])
+        return valores[nombre]
+
+    def ejecutar(self, vista, valores):
+        funcion, entradas = self._vistas[vista]
+        return funcion(*[self.evaluar(entrada, valores) for entrada in entradas])
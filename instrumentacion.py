@@ -0,0 +1,160 @@
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+import pandas as pd
+
+
+# Medición opcional de tiempo, filas y memoria por etapa de un rerun.
+# Apagada por defecto: `etapa()` devuelve un contexto vacío y no mide nada.
+# Se activa con variables de entorno:
+#   INSTRUMENTACION=1                 activa la medición
+#   INSTRUMENTACION_MUESTREO=0.1      fracción de reruns que se miden
+#   INSTRUMENTACION_MEMORIA=1         pico de memoria con tracemalloc (más lento)
+#   INSTRUMENTACION_LOG=archivo.jsonl agrega cada rerun medido al archivo
+
+_actual = ContextVar("instrumentacion", default=None)
+
+# tracemalloc es del proceso y lo comparten todas las sesiones: se cuenta
+# cuántas instrumentaciones lo usan y solo se detiene cuando la última termina
+# (y nunca si ya estaba activo por fuera de este módulo). El pico también es
+# del proceso y cada etapa lo reinicia: si otra sesión o el refrescador miden
+# memoria al mismo tiempo, el pico_bytes de una etapa puede quedar corto o
+# incluir memoria de la otra. Para cifras exactas, medir con una sola sesión.
+_memoria_lock = threading.Lock()
+_memoria_usuarios = 0
+_memoria_propia = False
+
+
+def _usar_tracemalloc():
+    global _memoria_usuarios, _memoria_propia
+    with _memoria_lock:
+        if _memoria_usuarios == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memoria_propia = True
+        _memoria_usuarios += 1
+
+
+def _soltar_tracemalloc():
+    global _memoria_usuarios, _memoria_propia
+    with _memoria_lock:
+        _memoria_usuarios -= 1
+        if _memoria_usuarios == 0 and _memoria_propia:
+            tracemalloc.stop()
+            _memoria_propia = False
+
+
+class Instrumentacion:
+
+    def __init__(self, memoria=False, ruta_log=None):
+        self.memoria = memoria
+        self.ruta_log = ruta_log
+        self.registros = []
+        self._pila = []
+        self._inicio = time.time()
+        self._usa_tracemalloc = memoria
+        if memoria:
+            _usar_tracemalloc()
+
+    # El registro que se entrega permite fijar las filas al final de la etapa:
+    #   with etapa("limpieza") as registro: ... registro["filas"] = len(df)
+    @contextmanager
+    def etapa(self, nombre, filas=None):
+        registro = {"etapa": nombre, "nivel": len(self._pila), "filas": filas, "segundos": None, "pico_bytes": None}
+        marco = {"memoria_inicial": 0, "pico_hijos": 0}
+        if self.memoria:
+            memoria, pico = tracemalloc.get_traced_memory()
+            # El pico que la etapa padre alcanzó hasta aquí se perdería con reset_peak
+            if self._pila:
+                self._pila[-1]["pico_hijos"] = max(self._pila[-1]["pico_hijos"], pico)
+            marco["memoria_inicial"] = memoria
+            tracemalloc.reset_peak()
+        self._pila.append(marco)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro["segundos"] = time.perf_counter() - inicio
+            self._pila.pop()
+            if self.memoria:
+                # El pico de tracemalloc es global: se combina con el de las etapas anidadas
+                pico = max(tracemalloc.get_traced_memory()[1], marco["pico_hijos"])
+                registro["pico_bytes"] = max(pico - marco["memoria_inicial"], 0)
+                if self._pila:
+                    self._pila[-1]["pico_hijos"] = max(self._pila[-1]["pico_hijos"], pico)
+            self.registros.append(registro)
+
+    # Totales por etapa en el orden en que aparecieron
+    def resumen(self):
+        if not self.registros:
+            return pd.DataFrame(columns=["etapa", "veces", "segundos", "filas", "pico_MB"])
+        registros = pd.DataFrame(self.registros)
+        resumen = registros.groupby("etapa", sort=False).agg(
+            veces=("segundos", "size"),
+            segundos=("segundos", "sum"),
+            filas=("filas", "sum"),
+            pico_MB=("pico_bytes", "max"),
+        ).reset_index()
+        resumen["pico_MB"] = resumen["pico_MB"] / 2 ** 20
+        return resumen
+
+    def terminar(self, **extra):
+        if self._usa_tracemalloc:
+            self._usa_tracemalloc = False
+            _soltar_tracemalloc()
+        if self.ruta_log:
+            linea = dict(extra, inicio=self._inicio, registros=self.registros)
+            with open(self.ruta_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(linea, ensure_ascii=False, default=str) + "\n")
+
+
+# Decide si este rerun se mide y deja la instrumentación como la actual del
+# contexto. Devuelve None cuando no se mide.
+def iniciar(activa=False, muestreo=1.0, memoria=False, ruta_log=None):
+    # Un rerun anterior que se cortó (por ejemplo con st.stop) no llegó a terminar
+    terminar()
+    instrumentacion = None
+    if activa and random.random() < muestreo:
+        instrumentacion = Instrumentacion(memoria=memoria, ruta_log=ruta_log)
+    _actual.set(instrumentacion)
+    return instrumentacion
+
+
+def iniciar_desde_entorno():
+    return iniciar(
+        activa=os.environ.get("INSTRUMENTACION", "0") == "1",
+        muestreo=float(os.environ.get("INSTRUMENTACION_MUESTREO", "1")),
+        memoria=os.environ.get("INSTRUMENTACION_MEMORIA", "0") == "1",
+        ruta_log=os.environ.get("INSTRUMENTACION_LOG") or None,
+    )
+
+
+def terminar(**extra):
+    instrumentacion = _actual.get()
+    if instrumentacion is not None:
+        instrumentacion.terminar(**extra)
+    _actual.set(None)
+
+
+# Etapa medida con la instrumentación actual, o un contexto vacío si no hay
+def etapa(nombre, filas=None):
+    instrumentacion = _actual.get()
+    if instrumentacion is None:
+        return nullcontext({})
+    return instrumentacion.etapa(nombre, filas)
+
+
+def medido(nombre):
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from instrumentacion import etapa
+
+
+# Valores del Sheet que se consideran vacíos
+VALORES_NULOS = ["<5", "N/A", "—", "-", ""]
+
+COLS_TO_NUMERIC = [
+    'Recruitment. Candidatos nuevos', 'Recruitment. Candidatos Indeed',
+    'Recruitment. Busqueda directa', 'Recruitment. Candidatos R.CRM',
+    'Recruitment. Assigned', 'Recruitment. Candidatos Viables',
+    'Screening. CV. MUST', 'Screening. CV. H.Skills', 'Screening. CV. S.Skills',
+    'Screening. CNV. Perfil no calificado (hard skills)', 'Screening. CNV. Soft Skills',
+    'Screening. CNV. Fuera de presupuesto', 'Screening. CNV. Nivel de ingles',
+    'Screening. CNV. No se presento / Inpuntual', 'Screening. CNV. Localidad',
+    'S. Cliente. Quimica personal', 'S. Cliente. Inconsistencias en expertise',
+    'S. Cliente. No cumple con el perfil', 'S. Cliente. Nivel de ingles',
+    'S. Cliente. Sobrecalificado', 'Candidatos contratados'
+]
+
+# Columnas de texto con pocos valores distintos que guardamos como categóricas
+COLUMNAS_CATEGORICAS = ["Posicion", "Nombre reclutador", "Fuente"]
+
+# Únicas columnas del Sheet que usa el dashboard; el resto no se carga
+COLUMNAS_USADAS = ["Posicion", "Fecha", "Nombre reclutador", "¿Posicion abierta?", "Terna"] + COLS_TO_NUMERIC
+
+# Tipo final de cada columna. Los conteos son enteros chicos: los volúmenes de
+# Recruitment en int32 y el resto en int16; lo que venga vacío queda en 0.
+# "¿Posicion abierta?" queda como bandera: True salvo que diga "no".
+ESQUEMA = {
+    "Posicion": "category",
+    "Nombre reclutador": "category",
+    "Fuente": "category",
+    "Fecha": "datetime64[ns]",
+    "¿Posicion abierta?": "bool",
+    "Terna": "int16",
+}
+for _col in COLS_TO_NUMERIC:
+    ESQUEMA[_col] = "int32" if _col.startswith("Recruitment.") else "int16"
+
+# Filas por bloque al leer el CSV
+TAMANO_BLOQUE = 50_000
+
+
+# Lee el CSV descargado por bloques, limpiando y tipando cada bloque antes de
+# leer el siguiente, para que la memoria no crezca a un múltiplo del archivo.
+# Las estadísticas de calidad de todos los bloques quedan en df.attrs["calidad"].
+def leer_csv_limpio(ruta, tamano_bloque=TAMANO_BLOQUE):
+    lector = pd.read_csv(
+        ruta, encoding="utf-8", chunksize=tamano_bloque,
+        usecols=lambda col: col.strip() in COLUMNAS_USADAS
+    )
+    calidad = {}
+    bloques = []
+    while True:
+        with etapa("parseo_csv") as registro:
+            bloque = next(lector, None)
+            registro["filas"] = 0 if bloque is None else len(bloque)
+        if bloque is None:
+            break
+        with etapa("limpieza", filas=len(bloque)):
+            bloques.append(limpiar_datos(bloque, calidad))
+    if not bloques:
+        df = limpiar_datos(pd.read_csv(ruta, encoding="utf-8", usecols=lambda col: col.strip() in COLUMNAS_USADAS), calidad)
+    else:
+        with etapa("union_bloques", filas=sum(len(bloque) for bloque in bloques)):
+            df = unir_bloques(bloques)
+    df.attrs["calidad"] = calidad
+    return df
+
+
+# Concatena bloques ya limpios conservando las categóricas
+def unir_bloques(bloques):
+    if len(bloques) == 1:
+        return bloques[0]
+    for col in COLUMNAS_CATEGORICAS:
+        if col not in bloques[0].columns:
+            continue
+        categorias = union_categoricals([bloque[col] for bloque in bloques], sort_categories=True).categories
+        for bloque in bloques:
+            bloque[col] = bloque[col].cat.set_categories(categorias)
+    # Por si un bloque quedó numérico y otro como texto en la misma columna
+    return tipar_columnas(pd.concat(bloques))
+
+
+# Primera limpieza general del Sheet crudo: cada columna pasa una sola vez a
+# su tipo del ESQUEMA. Si se pasa `calidad` se suman ahí los conteos de filas
+# leídas, fechas inválidas, vacíos, valores no numéricos y fuera de rango.
+def limpiar_datos(df, calidad=None):
+    calidad = calidad if calidad is not None else {}
+    df.columns = df.columns.str.strip()
+
+    fechas = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
+    validas = fechas.notna().to_numpy()
+    _sumar(calidad, "filas_leidas", len(df))
+    _sumar(calidad, "fechas_invalidas", int((~validas).sum()))
+    df = df[validas]
+
+    limpio = {}
+    for col in df.columns:
+        tipo = ESQUEMA.get(col)
+        valores = df[col]
+        vacios = valores.isna() | valores.isin(VALORES_NULOS)
+        _sumar(calidad, "vacios", int(vacios.sum()), col)
+        if col == "Fecha":
+            limpio[col] = fechas[validas].astype(tipo)
+        elif tipo in ("category", "bool"):
+            limpio[col] = _texto_normalizado(valores.where(~vacios, "0"), tipo)
+        elif tipo is not None:
+            limpio[col] = _conteo(col, valores, vacios, tipo, calidad)
+        else:
+            limpio[col] = valores.where(~vacios, 0)
+    return tipar_columnas(pd.DataFrame(limpio, index=df.index))
+
+
+# Los textos se limpian sobre sus valores distintos, no fila por fila
+def _texto_normalizado(valores, tipo):
+    codigos, unicos = pd.factorize(valores)
+    unicos = pd.Index(unicos.astype(str)).str.strip()
+    if tipo == "bool":
+        return pd.Series(unicos.str.lower().to_numpy()[codigos] != "no", index=valores.index)
+    categorias = pd.Index(sorted(set(unicos)))
+    return pd.Series(
+        pd.Categorical.from_codes(categorias.get_indexer(unicos)[codigos], categories=categorias),
+        index=valores.index,
+    )
+
+
+def _conteo(col, valores, vacios, tipo, calidad):
+    numeros = pd.to_numeric(valores.where(~vacios), errors="coerce")
+    _sumar(calidad, "no_numericos", int((numeros.isna() & ~vacios).sum()), col)
+    numeros = numeros.fillna(0).round()
+    limites = np.iinfo(tipo)
+    _sumar(calidad, "fuera_de_rango", int(((numeros < limites.min) | (numeros > limites.max)).sum()), col)
+    return numeros.clip(limites.min, limites.max).astype(tipo)
+
+
+def _sumar(calidad, medida, cantidad, col=None):
+    if col is None:
+        calidad[medida] = calidad.get(medida, 0) + cantidad
+    elif cantidad:
+        por_columna = calidad.setdefault(medida, {})
+        por_columna[col] = por_columna.get(col, 0) + cantidad
+
+
+# Tabla de las estadísticas de calidad de varias fuentes: {fuente: calidad}
+def resumen_calidad(calidad_por_fuente):
+    filas = []
+    for fuente, calidad in calidad_por_fuente.items():
+        for medida, valor in calidad.items():
+            por_columna = valor if isinstance(valor, dict) else {"": valor}
+            for col, cantidad in por_columna.items():
+                filas.append({"Fuente": fuente, "Medida": medida, "Columna": col, "Cantidad": cantidad})
+    return pd.DataFrame(filas, columns=["Fuente", "Medida", "Columna", "Cantidad"])
+
+
+# Deja cada columna con un tipo fijo para poder guardarla en formato columnar
+# y para restaurarlo al leer un snapshot o al unir bloques
+def tipar_columnas(df):
+    for col in df.columns:
+        tipo = ESQUEMA.get(col)
+        if tipo == "category":
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            df[col] = df[col].astype(str).astype("category")
+        elif tipo is not None:
+            if df[col].dtype != tipo:
+                df[col] = df[col].astype(tipo)
+        elif df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            # Columnas de texto que en realidad son números
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                df[col] = df[col].astype(str)
+    return df
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+# Tabla que se pagina, ordena y busca del lado del servidor. Al navegador solo
+# se manda la página visible, y el estilo (si hay) se aplica solo sobre ella.
+# Los órdenes por columna se calculan la primera vez que se piden y se guardan;
+# la búsqueda es una sola comparación vectorizada sobre el texto de las
+# columnas ya concatenado en minúsculas.
+class TablaPaginada:
+
+    def __init__(self, df, columnas_busqueda=None):
+        self.df = df.reset_index(drop=True)
+        self.columnas_busqueda = list(columnas_busqueda or self.df.columns)
+        self._ordenes = {}
+        self._texto = None
+        self._ultima_busqueda = (None, None)
+
+    # Filas de la página pedida y el total de filas que coinciden con la búsqueda
+    def pagina(self, numero=1, tamano=50, orden=None, descendente=False, busqueda=""):
+        filas = self._orden(orden, descendente) if orden else None
+        if busqueda:
+            coincide = self._coincidencias(busqueda)
+            filas = np.flatnonzero(coincide) if filas is None else filas[coincide[filas]]
+
+        total = len(self.df) if filas is None else len(filas)
+        numero = min(max(int(numero), 1), paginas(total, tamano))
+        desde = (numero - 1) * tamano
+        if filas is None:
+            return self.df.iloc[desde:desde + tamano], total
+        return self.df.iloc[filas[desde:desde + tamano]], total
+
+    def _orden(self, columna, descendente):
+        clave = (columna, descendente)
+        orden = self._ordenes.get(clave)
+        if orden is None:
+            valores = self.df[columna]
+            if valores.dtype == object:
+                valores = valores.astype(str)
+            orden = valores.sort_values(ascending=not descendente, kind="stable", na_position="last").index.to_numpy()
+            self._ordenes[clave] = orden
+        return orden
+
+    def _coincidencias(self, busqueda):
+        busqueda = busqueda.strip().lower()
+        texto, coincide = self._ultima_busqueda
+        if texto == busqueda:
+            return coincide
+        if self._texto is None:
+            partes = [self.df[columna].astype(str) for columna in self.columnas_busqueda]
+            concatenado = partes[0]
+            for parte in partes[1:]:
+                concatenado = concatenado + "\t" + parte
+            self._texto = concatenado.str.lower()
+        coincide = self._texto.str.contains(busqueda, regex=False).to_numpy(dtype=bool)
+        self._ultima_busqueda = (busqueda, coincide)
+        return coincide
+
+
+def paginas(total, tamano):
+    return max(-(-total // tamano), 1)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from cubo import COLUMNAS_CUBO
+
+
+# Índice de posición a filas. Los registros se ordenan una vez por
+# (Posicion, Fecha) y cada posición queda como un rango contiguo [inicio, fin),
+# así sus filas son un corte de iloc sin recorrer el df. Junto con los rangos
+# se guarda un resumen por posición calculado en una sola pasada con
+# np.add.reduceat sobre esos mismos rangos.
+class IndicePosiciones:
+
+    def __init__(self, df):
+        posiciones = df["Posicion"]
+        if not isinstance(posiciones.dtype, pd.CategoricalDtype):
+            posiciones = posiciones.astype("category")
+        codigos = posiciones.cat.codes.to_numpy()
+        orden = np.lexsort((df["Fecha"].to_numpy(), codigos))
+        orden = orden[codigos[orden] >= 0]
+        self.df = df.take(orden)
+
+        # Los códigos válidos son >= 0, así el primer renglón siempre abre un rango
+        codigos = codigos[orden]
+        self._inicios = np.flatnonzero(np.diff(codigos, prepend=-1))
+        self._fines = np.r_[self._inicios[1:], len(codigos)].astype(np.intp)[:len(self._inicios)]
+        nombres = posiciones.cat.categories[codigos[self._inicios]]
+        self._rangos = dict(zip(nombres, zip(self._inicios.tolist(), self._fines.tolist())))
+        self.resumen = self._resumir(codigos, nombres)
+
+    def rango(self, posicion):
+        return self._rangos.get(posicion, (0, 0))
+
+    # Registros de una posición ordenados por fecha
+    def filas(self, posicion):
+        inicio, fin = self.rango(posicion)
+        return self.df.iloc[inicio:fin]
+
+    # Un renglón por posición, indexado por Posicion. El último registro es el
+    # primero de la fecha más reciente, igual que idxmax en TablasDerivadas.ultimos.
+    def _resumir(self, codigos, nombres):
+        df = self.df
+        fechas = df["Fecha"].to_numpy()
+        filas = np.arange(len(df))
+        nuevo_dia = np.ones(len(df), dtype=bool)
+        nuevo_dia[1:] = (codigos[1:] != codigos[:-1]) | (fechas[1:] != fechas[:-1])
+        primera_del_dia = np.maximum.accumulate(np.where(nuevo_dia, filas, 0))
+        ultimos = primera_del_dia[self._fines - 1]
+
+        resumen = pd.DataFrame({
+            "Nombre reclutador": df["Nombre reclutador"].to_numpy()[ultimos],
+            "Abierta": df["¿Posicion abierta?"].to_numpy()[ultimos],
+            "Fecha_apertura": fechas[self._inicios],
+            "Ultima_actualizacion": fechas[ultimos],
+            "Registros": self._fines - self._inicios,
+        }, index=pd.Index(nombres, name="Posicion"))
+
+        terna = df["Terna"].to_numpy(dtype=np.int64)
+        columnas = [columna for columna in COLUMNAS_CUBO if columna in df.columns]
+        resumen["Total ternas enviadas"] = np.add.reduceat((terna > 0).astype(np.int64), self._inicios)
+        resumen["Total candidatos enviados"] = np.add.reduceat(terna, self._inicios)
+        sumas = np.add.reduceat(df[columnas].to_numpy(dtype=np.int64), self._inicios, axis=0)
+        return pd.concat([resumen, pd.DataFrame(sumas, index=resumen.index, columns=columnas)], axis=1)
@@ -0,0 +1,329 @@
+import argparse
+import contextvars
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from cache_compartida import clave, desde_entorno, dataframe_a_bytes, bytes_a_dataframe, json_a_bytes, bytes_a_json
+from cargador import CargadorSheets
+from carga import IndiceCarga
+from dias_habiles import ContadorDiasHabiles, calendario_mexico
+from fuentes import cargar_registro, crear_sesion, obtener_fuentes, concatenar_fuentes, posiciones_repetidas, renombrar_repetidas
+from instrumentacion import etapa, iniciar_desde_entorno, terminar
+from limpieza import leer_csv_limpio, tipar_columnas
+from snapshot import SnapshotColumnar, directorio_para
+from tablas_derivadas import obtener_tablas
+from tiempos import IndiceTiempos
+
+
+# Tablas derivadas que se dejan calculadas al publicar una versión
+PRECALCULADAS = ["embudo", "cubo", "fechas_apertura", "resumen_tabla", "carga_reclutador", "ternas_largo", "resumen_posiciones"]
+
+
+# Versiones publicadas del dataset limpio. Cada versión es un archivo Arrow
+# inmutable (datos-<version>.arrow) y actual.json apunta a la vigente; las
+# sesiones solo leen, nunca descargan ni limpian. La lectura se guarda en
+# memoria mientras la versión no cambie, así todas las sesiones del proceso
+# comparten el mismo DataFrame. Con una caché compartida (varias réplicas)
+# actual.json y los datos se publican también ahí y se leen de ahí; si la caché
+# ya desalojó los datos, los vuelve a poner una sola réplica: desde su archivo
+# local si lo tiene, o volviendo a publicar con `recuperar` (ver Refrescador).
+class Publicaciones:
+
+    def __init__(self, directorio=".cache_publicado", conservar=3, cache=None):
+        self.directorio = directorio
+        self.conservar = conservar
+        self.cache = cache
+        self.recuperar = None
+        self._memoria = None
+        self._lock = threading.Lock()
+
+    def actual(self):
+        if self.cache is not None:
+            actual = bytes_a_json(self.cache.obtener("publicacion:actual"))
+            if actual is not None:
+                return actual
+        try:
+            with open(os.path.join(self.directorio, "actual.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # Devuelve (df, version, errores) de la versión vigente, o None si no hay
+    def leer(self):
+        actual = self.actual()
+        if actual is None:
+            return None
+        with self._lock:
+            if self._memoria is not None and self._memoria[1] == actual["version"]:
+                return self._memoria
+        try:
+            if self.cache is not None:
+                datos = self.cache.obtener_o_calcular(clave(actual["version"], "publicacion"), lambda: self._recuperar(actual))
+                df = tipar_columnas(bytes_a_dataframe(datos))
+            else:
+                df = self._leer_archivo(actual)
+        except FileNotFoundError:
+            # Mientras se recuperaba pudo publicarse otra versión
+            nueva = self.actual()
+            if nueva is None or nueva["version"] == actual["version"]:
+                raise
+            return self.leer()
+        publicado = (df, actual["version"], actual.get("errores", []))
+        with self._lock:
+            self._memoria = publicado
+        return publicado
+
+    def _leer_archivo(self, actual):
+        with pa.memory_map(os.path.join(self.directorio, actual["archivo"]), "r") as fuente:
+            return tipar_columnas(ipc.open_file(fuente).read_all().to_pandas())
+
+    # Datos de una versión que ya no están en la caché compartida. El archivo
+    # local solo existe en la réplica que la publicó; en las demás se vuelve a
+    # publicar la versión vigente.
+    def _recuperar(self, actual):
+        ruta = os.path.join(self.directorio, actual["archivo"])
+        if not os.path.exists(ruta) and self.recuperar is not None:
+            self.recuperar()
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"La versión {actual['version']} ya no está en la caché compartida ni en {self.directorio}")
+        return dataframe_a_bytes(self._leer_archivo(actual))
+
+    def publicar(self, df, version, errores=(), calidad=None):
+        os.makedirs(self.directorio, exist_ok=True)
+        archivo = f"datos-{version}.arrow"
+        ruta = os.path.join(self.directorio, archivo)
+        if not os.path.exists(ruta):
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(ruta + ".tmp", "wb") as sink:
+                with ipc.new_file(sink, tabla.schema) as writer:
+                    writer.write_table(tabla)
+            os.replace(ruta + ".tmp", ruta)
+
+        actual = {
+            "version": version, "archivo": archivo, "errores": list(errores),
+            "calidad": calidad or {}, "publicado_en": time.time(),
+        }
+        temporal = os.path.join(self.directorio, "actual.json.tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(actual, f)
+        os.replace(temporal, os.path.join(self.directorio, "actual.json"))
+        if self.cache is not None:
+            # Primero los datos y después el puntero, así nadie lee una versión sin datos
+            self.cache.guardar(clave(version, "publicacion"), dataframe_a_bytes(df))
+            self.cache.guardar("publicacion:actual", json_a_bytes(actual))
+        with self._lock:
+            self._memoria = (df, version, list(errores))
+        self._limpiar_anteriores(archivo)
+
+    # Borra las versiones más viejas; quien ya las tenga abiertas con memory map
+    # las sigue leyendo hasta cerrarlas
+    def _limpiar_anteriores(self, vigente):
+        archivos = sorted(glob.glob(os.path.join(self.directorio, "datos-*.arrow")), key=os.path.getmtime)
+        for ruta in archivos[:-self.conservar]:
+            if os.path.basename(ruta) != vigente:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+
+# Descarga, limpia y publica el dataset cada `intervalo` segundos, una sola
+# vez para todo el servidor sin importar cuántas sesiones haya abiertas. Se
+# puede correr como hilo dentro de Streamlit o como proceso aparte:
+#   python refrescador.py --intervalo 300
+# Con una caché compartida, en cada intervalo refresca solo la réplica que
+# toma el bloqueo "refresco"; las demás leen lo que esa publica.
+class Refrescador:
+
+    def __init__(self, fuentes, cargador, publicaciones, intervalo=300, contador=None, cache=None):
+        self.fuentes = fuentes
+        self.cargador = cargador
+        self.publicaciones = publicaciones
+        self.intervalo = intervalo
+        self.contador = contador
+        self.cache = cache
+        self.ultimo_error = None
+        self.medicion = None
+        self.carga = IndiceCarga()
+        self.tiempos = IndiceTiempos(contador if contador is not None else ContadorDiasHabiles(calendario_mexico()))
+        self._fuentes_carga = None
+        self._repetidas = set()
+        self._limpios = {}
+        self._calidad = {}
+        self._detener = threading.Event()
+        self._hilo = None
+        self._lock = threading.RLock()
+        # Si la caché compartida desaloja los datos publicados, esta réplica
+        # puede volver a publicarlos aunque no tenga el archivo local
+        publicaciones.recuperar = lambda: self.refrescar(forzar=True)
+
+    # Publica una primera versión si no hay ninguna y arranca el hilo. Si ya
+    # había una en disco se sirve esa y el hilo la revalida de inmediato.
+    def iniciar(self):
+        habia_publicada = self.publicaciones.actual() is not None
+        if not habia_publicada and self.cache is None:
+            self.refrescar_medido()
+        elif not habia_publicada:
+            # La primera réplica que arranca publica; las demás esperan esa versión
+            self.cache.obtener_o_calcular("publicacion:actual", self._primera_publicacion)
+        self._hilo = threading.Thread(target=self._bucle, args=(habia_publicada,), daemon=True)
+        self._hilo.start()
+
+    def _primera_publicacion(self):
+        self.refrescar_medido()
+        return self.cache.obtener("publicacion:actual")
+
+    def detener(self):
+        self._detener.set()
+
+    def _bucle(self, inmediato):
+        espera = 0 if inmediato else self.intervalo
+        while not self._detener.wait(espera):
+            espera = self.intervalo
+            # El bloqueo no se suelta: vence solo y así hay un refresco por intervalo
+            if self.cache is not None and self.cache.tomar_bloqueo("refresco", self.intervalo * 0.9) is None:
+                continue
+            try:
+                self.refrescar_medido()
+                self.ultimo_error = None
+            except Exception as e:
+                self.ultimo_error = e
+
+    # Cada ciclo se mide en un contexto vacío con la misma configuración de
+    # entorno, y el resumen del último queda en self.medicion. No se copia el
+    # contexto de quien llama: si es un rerun, iniciar() terminaría su medición.
+    def refrescar_medido(self):
+        return contextvars.Context().run(self._refrescar_y_medir)
+
+    def _refrescar_y_medir(self):
+        instrumentacion = iniciar_desde_entorno()
+        try:
+            return self.refrescar()
+        finally:
+            if instrumentacion is not None:
+                self.medicion = instrumentacion.resumen()
+            terminar(origen="refrescador")
+
+    # Un ciclo completo; devuelve la versión vigente. Con forzar=True se vuelve
+    # a publicar aunque la versión ya esté publicada.
+    def refrescar(self, forzar=False):
+        with self._lock:
+            return self._refrescar(forzar)
+
+    def _refrescar(self, forzar):
+        versiones = []
+        errores = []
+        with etapa("descarga"):
+            resultados = obtener_fuentes(self.cargador, self.fuentes)
+        for fuente, entrada, error in resultados:
+            if error is not None:
+                errores.append(f"No se pudo cargar la fuente {fuente['nombre']}: {error}")
+                continue
+            versiones.append((fuente["nombre"], fuente["url"], entrada))
+        if not versiones:
+            raise Exception("No se pudo acceder al archivo.")
+
+        version = hashlib.sha1(repr([(nombre, url, entrada["version"]) for nombre, url, entrada in versiones]).encode("utf-8")).hexdigest()[:16]
+        actual = self.publicaciones.actual()
+        if not forzar and actual is not None and actual["version"] == version and actual.get("errores", []) == errores:
+            if self.carga.version == version and self.tiempos.version == version:
+                return version
+            # Arranque con la versión ya publicada: faltan los índices y las tablas
+            with etapa("lectura_publicacion"):
+                df = self.publicaciones.leer()[0]
+            deltas = [None]
+            repetidas = self._repetidas
+        else:
+            limpios = [(nombre, *self._limpiar(url, entrada)) for nombre, url, entrada in versiones]
+            df = concatenar_fuentes([(nombre, limpio) for nombre, limpio, _ in limpios])
+            with etapa("publicacion", filas=len(df)):
+                self.publicaciones.publicar(df, version, errores, {
+                    nombre: self._calidad[url] for nombre, url, _ in versiones if url in self._calidad
+                })
+            # Los deltas llevan los mismos nombres de posición que el df publicado
+            repetidas = posiciones_repetidas([(nombre, limpio) for nombre, limpio, _ in limpios])
+            deltas = [
+                None if delta is None else renombrar_repetidas(delta, nombre, repetidas)
+                for nombre, _, delta in limpios
+            ]
+
+        # La carga por reclutador y los tiempos de respuesta se actualizan solo
+        # con las filas que cambiaron, salvo que falte algún delta o haya
+        # cambiado el conjunto de fuentes o las posiciones que se renombran
+        fuentes_carga = [nombre for nombre, _, _ in versiones]
+        reconstruir = (
+            any(delta is None for delta in deltas) or fuentes_carga != self._fuentes_carga or repetidas != self._repetidas
+        )
+        delta = None if reconstruir else pd.concat(deltas, ignore_index=True)
+        with etapa("indice_carga"):
+            if reconstruir or self.carga.version is None:
+                self.carga.reconstruir(df, version)
+            else:
+                self.carga.actualizar(df, delta, version)
+        with etapa("indice_tiempos"):
+            if reconstruir or self.tiempos.version is None:
+                self.tiempos.reconstruir(df, version)
+            else:
+                self.tiempos.actualizar(df, delta, version)
+        self._fuentes_carga = fuentes_carga
+        self._repetidas = repetidas
+        if self.contador is not None:
+            tablas = obtener_tablas(df, version, self.contador, cache=self.cache)
+            for nombre in PRECALCULADAS:
+                getattr(tablas, nombre)
+        return version
+
+    # Dataset limpio de una fuente y las filas que cambiaron respecto a la
+    # versión anterior (None si no se sabe). Si el snapshot en disco ya
+    # corresponde a esa versión (arranque en frío) se lee sin volver a parsear.
+    def _limpiar(self, url, entrada):
+        anterior = self._limpios.get(url)
+        if anterior is not None and anterior[0] == entrada["version"]:
+            return anterior[1], anterior[1].iloc[:0]
+        snapshot = SnapshotColumnar(directorio_para(url))
+        df = None
+        delta = None
+        if snapshot.version() == entrada["version"]:
+            with etapa("lectura_snapshot"):
+                df = snapshot.leer()
+        if df is None:
+            df = leer_csv_limpio(entrada["ruta"])
+            self._calidad[url] = df.attrs["calidad"]
+            with etapa("escritura_snapshot", filas=len(df)):
+                delta = snapshot.actualizar(df, entrada["version"])
+        self._limpios[url] = (entrada["version"], df)
+        return df, delta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publica el dataset limpio para las sesiones del dashboard")
+    parser.add_argument("--intervalo", type=float, default=300)
+    parser.add_argument("--una-vez", action="store_true", help="Publica una sola vez y termina")
+    args = parser.parse_args(argv)
+
+    cache = desde_entorno()
+    fuentes = cargar_registro()
+    refrescador = Refrescador(
+        fuentes, CargadorSheets(session=crear_sesion(fuentes)), Publicaciones(cache=cache),
+        intervalo=args.intervalo, cache=cache
+    )
+    while True:
+        try:
+            print(f"Versión publicada: {refrescador.refrescar_medido()}", flush=True)
+        except Exception as e:
+            print(f"Error al refrescar: {e}", flush=True)
+        if args.una_vez:
+            break
+        time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import base64
+import html
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pandas as pd
+
+from alertas import estilo_alertas
+from calculos import grafo, PERIODOS
+from cache_compartida import desde_entorno
+from cargador import CargadorSheets
+from dias_habiles import ContadorDiasHabiles, calendario_mexico
+from fuentes import cargar_registro, crear_sesion, concatenar_fuentes
+from graficas import renderizar, GRAFICAS_POR_VISTA
+from limpieza import leer_csv_limpio
+from refrescador import Refrescador, Publicaciones
+from tablas_derivadas import obtener_tablas, huella_dataset
+
+
+# Reporte diario con las tres vistas del dashboard en un solo HTML (o PDF),
+# sin navegador ni Streamlit. Los datos se cargan y las tablas se calculan una
+# vez; las gráficas se renderizan en paralelo en un pool de procesos:
+#   python reporte.py --salida reporte.html
+#   python reporte.py --salida reporte.pdf --cada-posicion
+# El PDF necesita weasyprint (pip install weasyprint).
+
+ESTILO = """
+body { background-color: #F9F9F9; color: #2C3E50; font-family: 'Segoe UI', 'Roboto', sans-serif; margin: 2em; }
+h1, h2, h3 { color: #2C3E50; font-weight: 700; }
+h2 { border-bottom: 2px solid #2980B9; padding-bottom: .2em; margin-top: 2em; }
+img { max-width: 100%; }
+table { border-collapse: collapse; font-size: 12px; margin-bottom: 1em; }
+th, td { border: 1px solid #E0E0E0; padding: 4px 8px; text-align: left; }
+th { background-color: #ECEFF4; }
+.aviso { background-color: #FFF3CD; border: 1px solid #FFEE58; padding: .5em 1em; }
+.grafica { break-inside: avoid; }
+"""
+
+# Valores del grafo y resolución que recibe cada proceso del pool al arrancar
+_base = None
+_dpi = None
+
+
+def _iniciar_proceso(base, dpi):
+    global _base, _dpi
+    matplotlib.use("Agg")
+    _base = base
+    _dpi = dpi
+
+
+# Renderiza una gráfica de GRAFICAS_POR_VISTA en un proceso del pool. Los
+# nodos que no dependen de la posición ya vienen calculados en la base.
+def _renderizar_grafica(tarea):
+    vista, indice, posicion = tarea
+    _, construir, entradas = GRAFICAS_POR_VISTA[vista][indice]
+    valores = _base
+    if posicion != _base["posicion_sel"]:
+        dependientes = grafo.dependientes("posicion_sel")
+        valores = {nombre: valor for nombre, valor in _base.items() if nombre not in dependientes}
+        valores["posicion_sel"] = posicion
+    fig = construir(*[grafo.evaluar(entrada, valores) for entrada in entradas])
+    return None if fig is None else renderizar(fig, dpi=_dpi)
+
+
+# Dataset limpio: de CSVs locales si se pasan, si no de la versión publicada
+# por el refrescador, revalidándola contra los Sheets antes
+def cargar_datos(csvs=None, refrescar=True):
+    if csvs:
+        df = concatenar_fuentes([(os.path.splitext(os.path.basename(ruta))[0], leer_csv_limpio(ruta)) for ruta in csvs])
+        return df, huella_dataset(df), []
+
+    publicaciones = Publicaciones(cache=desde_entorno())
+    if refrescar or publicaciones.actual() is None:
+        fuentes = cargar_registro()
+        refrescador = Refrescador(fuentes, CargadorSheets(session=crear_sesion(fuentes)), publicaciones)
+        try:
+            refrescador.refrescar()
+        except Exception as e:
+            if publicaciones.actual() is None:
+                raise
+            print(f"No se pudo refrescar, se usa la última versión publicada: {e}", file=sys.stderr)
+    return publicaciones.leer()
+
+
+# Gráficas a renderizar: todas las vistas con "Todas" y, si se pide, las que
+# dependen del filtro de posición una vez por posición
+def tareas_del_reporte(posiciones):
+    por_posicion = grafo.dependientes("posicion_sel") | {"posicion_sel"}
+    tareas = []
+    for vista, graficas in GRAFICAS_POR_VISTA.items():
+        for indice in range(len(graficas)):
+            tareas.append((vista, indice, "Todas"))
+    for posicion in posiciones:
+        for vista, graficas in GRAFICAS_POR_VISTA.items():
+            for indice, (_, _, entradas) in enumerate(graficas):
+                if por_posicion.intersection(entradas):
+                    tareas.append((vista, indice, posicion))
+    return tareas
+
+
+def renderizar_graficas(base, tareas, procesos=None, dpi=120):
+    # Con fork los procesos heredan la base sin copiarla por pickle
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context("fork" if "fork" in metodos else None)
+    with ProcessPoolExecutor(procesos, mp_context=contexto, initializer=_iniciar_proceso, initargs=(base, dpi)) as pool:
+        imagenes = pool.map(_renderizar_grafica, tareas, chunksize=max(len(tareas) // (4 * (procesos or os.cpu_count() or 1)), 1))
+        return dict(zip(tareas, imagenes))
+
+
+def _ultimo_mes(percentiles):
+    return percentiles[percentiles["Mes"] == percentiles["Mes"].max()]
+
+
+def _tabla_html(df):
+    if isinstance(df, pd.DataFrame):
+        return df.to_html(index=False, border=0, na_rep="")
+    return df.hide(axis="index").to_html()
+
+
+def _grafica_html(titulo, imagen):
+    if imagen is None:
+        contenido = "<p>No hay datos suficientes para esta gráfica.</p>"
+    else:
+        contenido = f'<img src="data:image/png;base64,{base64.b64encode(imagen).decode("ascii")}">'
+    return f'<div class="grafica"><h3>{html.escape(titulo)}</h3>{contenido}</div>'
+
+
+def armar_html(valores, imagenes, posiciones, errores, generado_en):
+    partes = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Reporte de Reclutamiento</title>",
+        f"<style>{ESTILO}</style></head><body>",
+        "<h1>Reporte de Reclutamiento</h1>",
+        f"<p>Generado el {generado_en:%Y-%m-%d %H:%M}. Periodo: {html.escape(valores['periodo'])}, "
+        f"datos hasta el {valores['fecha_max']:%Y-%m-%d}.</p>",
+    ]
+    partes += [f'<p class="aviso">{html.escape(error)}</p>' for error in errores]
+
+    tablas_por_vista = {
+        "Resumen General": [
+            ("Detalle de posiciones abiertas", valores["resumen_tabla"]),
+            ("Alertas del día", estilo_alertas(valores["alertas_sourcing"])),
+        ],
+        "Posiciones cerradas": [
+            ("Tiempo de cierre por posición",
+             valores["cerradas"][["Posicion", "Nombre reclutador", "Fecha_apertura", "Fecha", "Dias_para_cerrar"]]),
+        ],
+        "Tiempos de respuesta": [
+            ("Por mes", valores["percentiles_mes"]),
+            ("Por reclutador (último mes)", _ultimo_mes(valores["percentiles_reclutador"])),
+        ],
+    }
+    for vista, graficas in GRAFICAS_POR_VISTA.items():
+        partes.append(f"<h2>{html.escape(vista)}</h2>")
+        for titulo, tabla in tablas_por_vista.get(vista, []):
+            partes.append(f"<h3>{html.escape(titulo)}</h3>{_tabla_html(tabla)}")
+        for indice, (titulo, _, _) in enumerate(graficas):
+            partes.append(_grafica_html(titulo, imagenes[(vista, indice, "Todas")]))
+
+    for posicion in posiciones:
+        graficas = [
+            (titulo, imagen) for (vista, indice, seleccion), imagen in imagenes.items()
+            if seleccion == posicion
+            for titulo in [GRAFICAS_POR_VISTA[vista][indice][0]]
+        ]
+        partes.append(f"<h2>Posición: {html.escape(str(posicion))}</h2>")
+        partes += [_grafica_html(titulo, imagen) for titulo, imagen in graficas]
+
+    partes.append("</body></html>")
+    return "\n".join(partes)
+
+
+def escribir(contenido, salida):
+    if salida.lower().endswith(".pdf"):
+        try:
+            from weasyprint import HTML
+        except ImportError:
+            raise SystemExit("Para generar PDF hay que instalar weasyprint; también se puede usar --salida reporte.html")
+        HTML(string=contenido).write_pdf(salida)
+    else:
+        with open(salida, "w", encoding="utf-8") as f:
+            f.write(contenido)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el reporte del dashboard en HTML o PDF sin navegador")
+    parser.add_argument("--salida", default="reporte.html", help="Archivo .html o .pdf")
+    parser.add_argument("--periodo", choices=PERIODOS, default="Mes")
+    parser.add_argument("--cada-posicion", action="store_true", help="Agrega las gráficas filtradas de cada posición")
+    parser.add_argument("--procesos", type=int, help="Procesos para renderizar (por defecto, uno por núcleo)")
+    parser.add_argument("--dpi", type=int, default=120)
+    parser.add_argument("--csv", nargs="+", help="Usar CSVs locales en lugar de los Sheets")
+    parser.add_argument("--sin-refrescar", action="store_true", help="Usar la última versión publicada tal cual")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    df, version, errores = cargar_datos(args.csv, refrescar=not args.sin_refrescar)
+    contador = ContadorDiasHabiles(calendario_mexico())
+    tablas = obtener_tablas(df, version, contador)
+    valores = {
+        "df": df,
+        "version": version,
+        "contador": contador,
+        "indice_carga": None,
+        "indice_tiempos": None,
+        "tablas": tablas,
+        "posicion_sel": "Todas",
+        "periodo": args.periodo,
+        "fecha_max": tablas.rango_fechas[1],
+    }
+    # Todo lo de "Todas" se calcula aquí una sola vez y lo heredan los procesos
+    for graficas in GRAFICAS_POR_VISTA.values():
+        for _, _, entradas in graficas:
+            for entrada in entradas:
+                grafo.evaluar(entrada, valores)
+    for nombre in ["resumen_tabla", "alertas_sourcing", "cerradas", "percentiles_reclutador"]:
+        grafo.evaluar(nombre, valores)
+
+    posiciones = tablas.posiciones if args.cada_posicion else []
+    tareas = tareas_del_reporte(posiciones)
+    imagenes = renderizar_graficas(valores, tareas, args.procesos, args.dpi)
+    escribir(armar_html(valores, imagenes, posiciones, errores, pd.Timestamp.now()), args.salida)
+    print(f"Reporte escrito en {args.salida}: {len(tareas)} gráficas en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from alertas import acumular_sourcing, aplicar_reglas, cargar_umbrales_por_fuente, marcas_por_posicion
+from cache_compartida import desde_entorno
+from dias_habiles import ContadorDiasHabiles, calendario_mexico
+from limpieza import COLUMNAS_CATEGORICAS
+from refrescador import Publicaciones
+
+
+# Alertas del día sin abrir el dashboard, pensado para cron:
+#   */5 * * * * python revisar_alertas.py --json alertas.json --csv alertas.csv
+# Lee la última versión publicada por refrescador.py y guarda en --estado los
+# acumulados y la marca de agua de cada posición (ver marcas_por_posicion). Si
+# la versión publicada no cambió ni siquiera se abre el snapshot; si cambió,
+# solo se vuelven a acumular las posiciones cuya marca es distinta. Los días
+# hábiles y las reglas se aplican siempre, porque cambian con el día. Los
+# cambios de alerta desde la corrida anterior se imprimen en la salida.
+
+COLUMNAS_SALIDA = ["Posicion", "Nombre reclutador", "Dias_habiles", "Codigo alerta", "Alerta sourcing", "Codigo anterior"]
+
+
+def leer_estado(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Se escribe a un temporal y se reemplaza, así una corrida que se interrumpe
+# no deja un estado a medias
+def guardar_estado(ruta, estado):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def acumulados_del_estado(estado):
+    acumulados = pd.DataFrame(estado["acumulados"])
+    if acumulados.empty:
+        return acumulados
+    acumulados["Fecha_apertura"] = pd.to_datetime(acumulados["Fecha_apertura"])
+    return acumulados
+
+
+# Acumulados de la versión publicada reutilizando los de las posiciones cuya
+# marca no cambió. Devuelve (acumulados, marcas, posiciones recalculadas).
+def actualizar_acumulados(df, estado):
+    marcas = marcas_por_posicion(df)
+    anteriores = estado["marcas"] if estado is not None else {}
+    cambiadas = [posicion for posicion, marca in marcas.items() if anteriores.get(posicion) != marca]
+
+    nuevos = acumular_sourcing(df[df["Posicion"].isin(cambiadas)]) if cambiadas else None
+    partes = [] if nuevos is None else [nuevos.astype({col: str for col in COLUMNAS_CATEGORICAS if col in nuevos.columns})]
+    if estado is not None and len(cambiadas) < len(marcas):
+        acumulados = acumulados_del_estado(estado)
+        conservar = acumulados["Posicion"].isin(marcas) & ~acumulados["Posicion"].isin(cambiadas)
+        partes.insert(0, acumulados[conservar])
+    if not partes:
+        return acumular_sourcing(df.iloc[:0]), marcas, cambiadas
+    acumulados = pd.concat(partes, ignore_index=True).sort_values("Posicion", kind="stable").reset_index(drop=True)
+    return acumulados, marcas, cambiadas
+
+
+# Alertas de hoy con el código de la corrida anterior; las posiciones que ya
+# no están en el dataset salen en los cambios con código actual None
+def evaluar(acumulados, hoy, contador, umbrales_por_fuente, anteriores):
+    acumulados = acumulados.copy()
+    acumulados["Dias_habiles"] = contador.contar(acumulados["Fecha_apertura"], hoy) if len(acumulados) else []
+    alertas = aplicar_reglas(acumulados, umbrales_por_fuente)
+    alertas = alertas.assign(**{
+        "Nombre reclutador": acumulados["Nombre reclutador"],
+        "Dias_habiles": acumulados["Dias_habiles"],
+        "Codigo alerta": alertas["Codigo alerta"].astype(str),
+        "Codigo anterior": [anteriores.get(posicion) for posicion in alertas["Posicion"]],
+    })[COLUMNAS_SALIDA]
+
+    cambios = [
+        {"Posicion": posicion, "Anterior": anterior, "Actual": actual}
+        for posicion, anterior, actual in zip(alertas["Posicion"], alertas["Codigo anterior"], alertas["Codigo alerta"])
+        if anterior != actual
+    ]
+    vigentes = set(alertas["Posicion"])
+    cambios += [
+        {"Posicion": posicion, "Anterior": anterior, "Actual": None}
+        for posicion, anterior in anteriores.items() if posicion not in vigentes
+    ]
+    return alertas, cambios
+
+
+def escribir_json(ruta, alertas, cambios, version, evaluado_en):
+    contenido = {
+        "version": version,
+        "evaluado_en": evaluado_en,
+        "alertas": json.loads(alertas.to_json(orient="records", force_ascii=False)),
+        "cambios": cambios,
+    }
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=2)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def escribir_csv(ruta, alertas):
+    alertas.to_csv(ruta + ".tmp", index=False, encoding="utf-8")
+    os.replace(ruta + ".tmp", ruta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evalúa las alertas de sourcing desde la última versión publicada")
+    parser.add_argument("--publicado", default=".cache_publicado", help="Directorio de las versiones publicadas")
+    parser.add_argument("--estado", default=".cache_alertas/estado.json", help="Acumulados y marcas de la corrida anterior")
+    parser.add_argument("--json", default="alertas.json", help="Archivo JSON con las alertas y los cambios")
+    parser.add_argument("--csv", help="Archivo CSV con las alertas")
+    parser.add_argument("--reglas", help="Umbrales por fuente (por defecto REGLAS_ALERTAS o reglas_alertas.json)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    publicaciones = Publicaciones(args.publicado, cache=desde_entorno())
+    actual = publicaciones.actual()
+    if actual is None:
+        raise SystemExit("No hay ninguna versión publicada; correr antes python refrescador.py --una-vez")
+
+    estado = leer_estado(args.estado)
+    if estado is not None and estado["version"] == actual["version"]:
+        acumulados, marcas, cambiadas = acumulados_del_estado(estado), estado["marcas"], []
+    else:
+        df, _, _ = publicaciones.leer()
+        acumulados, marcas, cambiadas = actualizar_acumulados(df, estado)
+
+    hoy = pd.Timestamp.today().normalize()
+    anteriores = estado["codigos"] if estado is not None else {}
+    alertas, cambios = evaluar(
+        acumulados, hoy, ContadorDiasHabiles(calendario_mexico()), cargar_umbrales_por_fuente(args.reglas), anteriores
+    )
+
+    evaluado_en = pd.Timestamp.now().isoformat(timespec="seconds")
+    escribir_json(args.json, alertas, cambios, actual["version"], evaluado_en)
+    if args.csv:
+        escribir_csv(args.csv, alertas)
+    guardar_estado(args.estado, {
+        "version": actual["version"],
+        "marcas": marcas,
+        "acumulados": json.loads(acumulados.to_json(orient="records", date_format="iso", force_ascii=False)),
+        "codigos": dict(zip(alertas["Posicion"], alertas["Codigo alerta"])),
+    })
+
+    for cambio in cambios:
+        print(f"{cambio['Posicion']}: {cambio['Anterior'] or '-'} -> {cambio['Actual'] or '-'}")
+    print(
+        f"{len(alertas)} alertas, {len(cambios)} cambios, {len(cambiadas)} posiciones recalculadas "
+        f"en {time.perf_counter() - inicio:.2f} s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
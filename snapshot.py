@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from limpieza import tipar_columnas
+
+
+# Columnas que identifican una fila del Sheet
+CLAVE = ["Posicion", "Fecha"]
+
+# Columnas internas del snapshot (no forman parte del dataset). El hash
+# incluye el número de fila, así que reordenar el Sheet también cuenta como cambio.
+_FILA = "_fila"
+_OCURRENCIA = "_ocurrencia"
+_HASH = "_hash"
+_INTERNAS = [_FILA, _OCURRENCIA, _HASH]
+
+
+def directorio_para(url, base=".cache_snapshot"):
+    return os.path.join(base, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+
+# Snapshot del dataset limpio guardado como archivos Arrow IPC (Feather v2).
+# Cada actualización agrega solo las filas nuevas o modificadas (por
+# Posicion + Fecha) como una parte más; al leer se abren las partes con
+# memory map y la versión más reciente de cada fila gana.
+class SnapshotColumnar:
+
+    def __init__(self, directorio, max_partes=8):
+        self.directorio = directorio
+        self.max_partes = max_partes
+        self._lock = threading.Lock()
+
+    def version(self):
+        return self._leer_manifiesto().get("version")
+
+    def leer(self):
+        manifiesto = self._leer_manifiesto()
+        if not manifiesto.get("partes"):
+            return None
+        df = self._leer_partes(manifiesto["partes"])
+        return df.drop(columns=[_OCURRENCIA, _HASH])
+
+    def actualizar(self, df, version):
+        # Devuelve solo las filas nuevas o modificadas respecto al snapshot
+        # anterior, o None si no hay un delta que lo exprese (primer snapshot,
+        # cambio de esquema o filas borradas) y se reescribió todo
+        with self._lock:
+            manifiesto = self._leer_manifiesto()
+            nuevo = _con_columnas_internas(df)
+
+            anterior = None
+            columnas_anteriores = None
+            if manifiesto.get("partes"):
+                anterior = self._leer_partes(manifiesto["partes"])
+                columnas_anteriores = [c for c in anterior.columns if c not in _INTERNAS]
+            if columnas_anteriores != list(df.columns):
+                # Primer snapshot o cambió el esquema del Sheet: se reescribe todo
+                self._reescribir(nuevo, version)
+                return None
+
+            llaves = CLAVE + [_OCURRENCIA]
+            comparacion = nuevo[llaves + [_HASH]].merge(
+                anterior[llaves + [_HASH]], on=llaves, how="left", suffixes=("", "_anterior")
+            )
+            if comparacion[_HASH + "_anterior"].notna().sum() < len(anterior):
+                # Se borraron filas del Sheet; un append no puede expresarlo
+                self._reescribir(nuevo, version)
+                return None
+
+            cambiadas = (comparacion[_HASH] != comparacion[_HASH + "_anterior"]).to_numpy()
+            delta = nuevo[cambiadas]
+
+            if len(manifiesto["partes"]) >= self.max_partes:
+                self._reescribir(nuevo, version)
+            elif delta.empty:
+                self._escribir_manifiesto(manifiesto["partes"], version)
+            else:
+                parte = self._escribir_parte(delta)
+                self._escribir_manifiesto(manifiesto["partes"] + [parte], version)
+            return delta.drop(columns=_INTERNAS)
+
+    # --- Archivos ---
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def _leer_manifiesto(self):
+        try:
+            with open(self._ruta("manifiesto.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _escribir_manifiesto(self, partes, version):
+        temporal = self._ruta("manifiesto.json.tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "partes": partes}, f)
+        os.replace(temporal, self._ruta("manifiesto.json"))
+
+    def _escribir_parte(self, df):
+        os.makedirs(self.directorio, exist_ok=True)
+        nombre = f"parte-{uuid.uuid4().hex}.arrow"
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        temporal = self._ruta(nombre + ".tmp")
+        with pa.OSFile(temporal, "wb") as sink:
+            with ipc.new_file(sink, tabla.schema) as writer:
+                writer.write_table(tabla)
+        os.replace(temporal, self._ruta(nombre))
+        return nombre
+
+    def _reescribir(self, df, version):
+        anteriores = self._leer_manifiesto().get("partes", [])
+        parte = self._escribir_parte(df)
+        self._escribir_manifiesto([parte], version)
+        for nombre in anteriores:
+            try:
+                os.remove(self._ruta(nombre))
+            except OSError:
+                pass
+
+    def _leer_partes(self, partes):
+        frames = []
+        for nombre in partes:
+            with pa.memory_map(self._ruta(nombre), "r") as fuente:
+                frames.append(ipc.open_file(fuente).read_all().to_pandas())
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if len(frames) > 1:
+            # La última parte tiene la versión vigente de cada fila
+            df = df.drop_duplicates(subset=CLAVE + [_OCURRENCIA], keep="last")
+        # Respetamos el orden original de las filas en el Sheet
+        df = df.set_index(_FILA).sort_index(kind="stable")
+        df.index.name = None
+        return tipar_columnas(df)
+
+
+def _con_columnas_internas(df):
+    nuevo = df.copy()
+    nuevo[_HASH] = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    nuevo[_OCURRENCIA] = nuevo.groupby(CLAVE, observed=True).cumcount()
+    nuevo[_FILA] = df.index.to_numpy()
+    return nuevo
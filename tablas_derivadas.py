@@ -0,0 +1,182 @@
+import threading
+from collections import OrderedDict
+from functools import cached_property, wraps
+
+import pandas as pd
+
+from cache_compartida import clave as clave_cache, dataframe_a_bytes, bytes_a_dataframe
+from cubo import CuboPeriodos
+from embudo import AgregadoEmbudo
+from posiciones import IndicePosiciones
+from tiempos import IndiceTiempos
+
+
+# Versiones del dataset que se mantienen en memoria a la vez
+MAX_VERSIONES = 4
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+# Como cached_property, pero si hay caché compartida (ver cache_compartida.py)
+# la tabla se guarda ahí con la versión y el día en la clave: la calcula un
+# solo proceso y los demás la leen.
+def compartida(funcion):
+    @wraps(funcion)
+    def calcular(self):
+        if self.cache is None or self.version is None:
+            return funcion(self)
+        clave = clave_cache(self.version, f"{self.hoy:%Y-%m-%d}", "tablas", funcion.__name__)
+        return bytes_a_dataframe(self.cache.obtener_o_calcular(clave, lambda: dataframe_a_bytes(funcion(self))))
+    return cached_property(calcular)
+
+
+# Tablas agregadas que comparten todas las vistas. Cada una se calcula la
+# primera vez que se pide y queda guardada mientras la versión del dataset
+# siga en caché. Las vistas no deben modificar estos DataFrames.
+class TablasDerivadas:
+
+    def __init__(self, df, contador, hoy, version=None, cache=None):
+        self.df = df
+        self.contador = contador
+        self.hoy = hoy
+        self.version = version
+        self.cache = cache
+
+    # Opciones del filtro de posición
+    @cached_property
+    def posiciones(self):
+        return sorted(self.df["Posicion"].unique())
+
+    # Primera y última fecha con registros
+    @cached_property
+    def rango_fechas(self):
+        return self.df["Fecha"].min(), self.df["Fecha"].max()
+
+    # Sumas por (Posicion, Nombre reclutador, Fecha) del embudo, descartes y conversión
+    @cached_property
+    def embudo(self):
+        return AgregadoEmbudo(self.df)
+
+    # Sumas diarias por posición para responder cualquier periodo sin filtrar el
+    # df; se arman desde el agregado del embudo, que ya recorrió los registros
+    @cached_property
+    def cubo(self):
+        return CuboPeriodos(self.embudo.sumas.reset_index())
+
+    # Rango de filas y resumen de cada posición para el detalle por posición
+    @cached_property
+    def indice_posiciones(self):
+        return IndicePosiciones(self.df)
+
+    # Resumen por posición con los días hábiles que lleva abierta
+    @cached_property
+    def resumen_posiciones(self):
+        resumen = self.indice_posiciones.resumen.copy()
+        resumen["Dias_habiles_abierta"] = self.contador.contar(resumen["Fecha_apertura"], self.hoy)
+        return resumen
+
+    # Percentiles de tiempos de respuesta desde cero, para cuando no hay un
+    # índice de tiempos al día (ver tiempos.py)
+    @cached_property
+    def tiempos(self):
+        tiempos = IndiceTiempos(self.contador)
+        tiempos.reconstruir(self.df, None)
+        return tiempos
+
+    # Fecha de apertura y días hábiles abierta de TODAS las posiciones
+    @compartida
+    def fechas_apertura(self):
+        fechas_apertura = self.df.groupby("Posicion", observed=True)["Fecha"].min().reset_index().rename(columns={"Fecha": "Fecha_apertura"})
+        fechas_apertura["Dias_habiles_abierta"] = self.contador.contar(fechas_apertura["Fecha_apertura"], self.hoy)
+        return fechas_apertura
+
+    # Registro más reciente de cada posición
+    @cached_property
+    def ultimos(self):
+        return self.df.loc[self.df.groupby("Posicion", observed=True)["Fecha"].idxmax()]
+
+    @cached_property
+    def abiertas(self):
+        return self.ultimos[self.ultimos["¿Posicion abierta?"]]
+
+    @cached_property
+    def cerradas(self):
+        return self.ultimos[~self.ultimos["¿Posicion abierta?"]]
+
+    # Registros donde efectivamente hubo envío de terna, con días hábiles desde la apertura
+    @cached_property
+    def ternas(self):
+        df_ternas = self.df[self.df["Terna"] > 0].merge(self.fechas_apertura, on="Posicion", how="left")
+        df_ternas["Dias_habiles_a_terna"] = self.contador.contar(df_ternas["Fecha_apertura"], df_ternas["Fecha"])
+        return df_ternas
+
+    # Un renglón por terna enviada, en formato largo y ordenado por posición
+    @compartida
+    def ternas_largo(self):
+        ternas_largo = self.ternas[["Posicion", "Nombre reclutador", "Fecha", "Dias_habiles_a_terna", "Terna"]].rename(
+            columns={"Nombre reclutador": "Reclutador", "Dias_habiles_a_terna": "Dias_habiles"}
+        )
+        return ternas_largo.sort_values("Posicion", kind="stable").reset_index(drop=True)
+
+    # Resumen por posición: total de ternas enviadas y total de candidatos enviados
+    @compartida
+    def resumen_ternas(self):
+        return self.ternas.groupby("Posicion", observed=True).agg(**{
+            "Nombre reclutador": ("Nombre reclutador", "first"),
+            "Fecha_apertura": ("Fecha_apertura", "first"),
+            "Total ternas enviadas": ("Terna", "size"),
+            "Total candidatos enviados": ("Terna", "sum"),
+        }).reset_index()
+
+    # Vista por posición con las fechas, días y tamaños de cada terna como listas
+    @cached_property
+    def resumen_final(self):
+        listas = self.ternas_largo.groupby("Posicion", observed=True).agg(**{
+            "Fecha": ("Fecha", list),
+            "Dias_habiles_a_terna": ("Dias_habiles", list),
+            "Terna": ("Terna", list),
+        }).reset_index()
+        return self.resumen_ternas.merge(listas, on="Posicion", how="left")
+
+    # Tabla de detalle de ternas con los días hábiles que lleva abierta cada posición
+    @compartida
+    def resumen_tabla(self):
+        resumen_tabla = self.resumen_ternas[[
+            "Posicion", "Nombre reclutador", "Fecha_apertura",
+            "Total ternas enviadas", "Total candidatos enviados"
+        ]]
+        return resumen_tabla.merge(
+            self.fechas_apertura[["Posicion", "Dias_habiles_abierta"]],
+            on="Posicion",
+            how="left"
+        )
+
+    # Posiciones abiertas por reclutador
+    @compartida
+    def carga_reclutador(self):
+        resumen = self.abiertas.groupby("Nombre reclutador", observed=True).size().reset_index(name="Posiciones abiertas")
+        posiciones_por_reclutador = self.abiertas.groupby("Nombre reclutador", observed=True)["Posicion"].apply(list).reset_index(name="Lista de posiciones")
+        return pd.merge(resumen, posiciones_por_reclutador, on="Nombre reclutador")
+
+
+# Devuelve las tablas derivadas de una versión del dataset, reutilizando las
+# ya calculadas. Se descartan las versiones menos usadas recientemente.
+def obtener_tablas(df, version, contador, hoy=None, cache=None):
+    hoy = (hoy if hoy is not None else pd.Timestamp.today()).normalize()
+    clave = (version, hoy)
+    with _lock:
+        tablas = _cache.get(clave)
+        if tablas is not None:
+            _cache.move_to_end(clave)
+            return tablas
+        tablas = TablasDerivadas(df, contador, hoy, version, cache)
+        _cache[clave] = tablas
+        while len(_cache) > MAX_VERSIONES:
+            _cache.popitem(last=False)
+    return tablas
+
+
+# Huella del contenido para cuando no se tiene la versión del Sheet
+def huella_dataset(df):
+    return format(int(pd.util.hash_pandas_object(df).to_numpy().sum()), "016x")
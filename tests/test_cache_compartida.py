@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from cache_compartida import CacheCompartida, CacheSQLite, CacheRedis
+
+
+def sqlite(tmp_path, max_bytes):
+    return CacheSQLite(str(tmp_path / "cache.db"), max_bytes=max_bytes)
+
+
+def redis(tmp_path, max_bytes):
+    fakeredis = pytest.importorskip("fakeredis")
+    return CacheRedis(fakeredis.FakeStrictRedis(), max_bytes=max_bytes)
+
+
+@pytest.fixture(params=[sqlite, redis], ids=["sqlite", "redis"])
+def crear_cache(request, tmp_path):
+    return lambda max_bytes=1024 * 1024: request.param(tmp_path, max_bytes)
+
+
+def test_single_flight_calcula_una_vez(crear_cache):
+    cache = crear_cache()
+    llamadas = []
+    resultados = []
+    inicio = threading.Barrier(8)
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.3)
+        return b"tabla"
+
+    def pedir():
+        inicio.wait()
+        resultados.append(cache.obtener_o_calcular("v1:tabla", calcular))
+
+    hilos = [threading.Thread(target=pedir) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(llamadas) == 1
+    assert resultados == [b"tabla"] * 8
+
+
+def test_si_falla_el_calculo_otro_lo_reintenta(crear_cache):
+    cache = crear_cache()
+
+    def fallar():
+        raise RuntimeError("sin datos")
+
+    with pytest.raises(RuntimeError):
+        cache.obtener_o_calcular("v1:tabla", fallar)
+    assert cache.obtener_o_calcular("v1:tabla", lambda: b"tabla") == b"tabla"
+
+
+def test_desaloja_las_menos_usadas_por_tamano(crear_cache):
+    cache = crear_cache(max_bytes=250)
+    for clave in ("a", "b"):
+        cache.guardar(clave, bytes(100))
+        time.sleep(0.01)
+    # Leer "a" la vuelve la más reciente: al llenarse sale "b"
+    assert cache.obtener("a") is not None
+    time.sleep(0.01)
+    cache.guardar("c", bytes(100))
+
+    assert cache.obtener("b") is None
+    assert cache.obtener("a") is not None
+    assert cache.obtener("c") is not None
+
+
+def test_una_entrada_mas_grande_que_el_limite_no_se_guarda(crear_cache):
+    cache = crear_cache(max_bytes=250)
+    cache.guardar("a", bytes(100))
+    cache.guardar("grande", bytes(300))
+
+    assert cache.obtener("grande") is None
+
+
+def test_un_backend_incompleto_falla_al_crearse():
+    class SoloLectura(CacheCompartida):
+        def obtener(self, clave):
+            return None
+
+    with pytest.raises(TypeError):
+        SoloLectura()
@@ -0,0 +1,60 @@
+import pandas as pd
+import pandas.testing as tm
+
+from carga import IndiceCarga
+
+
+def registros(filas):
+    return pd.DataFrame(filas, columns=["Posicion", "Fecha", "Nombre reclutador", "¿Posicion abierta?"]).assign(
+        Fecha=lambda df: pd.to_datetime(df["Fecha"])
+    )
+
+
+def reconstruido(df, version):
+    indice = IndiceCarga()
+    indice.reconstruir(df, version)
+    return indice
+
+
+def assert_igual_a_reconstruir(indice, df, version):
+    completo = reconstruido(df, version)
+    tm.assert_frame_equal(indice.estado()["ultimos"], completo.estado()["ultimos"])
+    tm.assert_frame_equal(indice.estado()["por_reclutador"], completo.estado()["por_reclutador"])
+    tm.assert_frame_equal(indice.carga(version), completo.carga(version))
+
+
+BASE = registros([
+    ["A", "2024-01-01", "Ana", True],
+    ["A", "2024-01-05", "Ana", True],
+    ["B", "2024-01-02", "Ana", True],
+    ["C", "2024-01-03", "Beto", True],
+])
+
+
+def test_fila_del_mismo_dia_da_lo_mismo_que_reconstruir():
+    # Otro registro de "A" el mismo día que su último: el índice completo se
+    # queda con el primero del día, el incremental debe hacer lo mismo
+    delta = registros([["A", "2024-01-05", "Otro", False]])
+    df = pd.concat([BASE, delta], ignore_index=True)
+
+    indice = reconstruido(BASE, "v1")
+    indice.actualizar(df, delta, "v2")
+
+    assert_igual_a_reconstruir(indice, df, "v2")
+    assert indice.cambios("v2").empty
+
+
+def test_filas_nuevas_y_corregidas_dan_lo_mismo_que_reconstruir():
+    delta = registros([
+        ["A", "2024-01-01", "Beto", True],       # fila vieja corregida
+        ["B", "2024-01-09", "Beto", False],      # cierre con otro reclutador
+        ["D", "2024-01-09", "Beto", True],       # posición nueva
+    ])
+    df = pd.concat([BASE, delta], ignore_index=True)
+
+    indice = reconstruido(BASE, "v1")
+    indice.actualizar(df, delta, "v2")
+
+    assert_igual_a_reconstruir(indice, df, "v2")
+    cambios = indice.cambios("v2").set_index("Posicion")["Cambio"].to_dict()
+    assert cambios == {"B": "Se cerró", "D": "Nueva"}
@@ -0,0 +1,95 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cargador import CargadorSheets
+
+
+# Sheet de prueba servido por HTTP local: responde 304 si el ETag coincide
+class Sheet(BaseHTTPRequestHandler):
+    contenido = b"Posicion,Fecha\nA,01/01/2024\n"
+    etag = '"v1"'
+    pedidos = []
+    respuestas = []
+    caido = False
+
+    def do_GET(self):
+        Sheet.pedidos.append(dict(self.headers))
+        if Sheet.caido:
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == Sheet.etag:
+            Sheet.respuestas.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        Sheet.respuestas.append(200)
+        self.send_response(200)
+        self.send_header("ETag", Sheet.etag)
+        self.send_header("Content-Length", str(len(Sheet.contenido)))
+        self.end_headers()
+        self.wfile.write(Sheet.contenido)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    Sheet.pedidos = []
+    Sheet.respuestas = []
+    Sheet.caido = False
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Sheet)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/export?format=csv"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_revalida_con_etag_y_reutiliza_la_copia(url, tmp_path):
+    cargador = CargadorSheets(directorio=str(tmp_path))
+    primera = cargador.refrescar(url)
+    segunda = cargador.refrescar(url)
+
+    assert Sheet.pedidos[1]["If-None-Match"] == '"v1"'
+    assert Sheet.respuestas == [200, 304]
+    assert segunda["version"] == primera["version"]
+    assert segunda["ruta"] == primera["ruta"]
+    with open(segunda["ruta"], "rb") as f:
+        assert f.read() == Sheet.contenido
+
+
+def test_al_arrancar_revalida_la_copia_en_disco(url, tmp_path):
+    primera = CargadorSheets(directorio=str(tmp_path)).refrescar(url)
+    segunda = CargadorSheets(directorio=str(tmp_path)).refrescar(url)
+
+    assert Sheet.pedidos[-1]["If-None-Match"] == '"v1"'
+    assert Sheet.respuestas == [200, 304]
+    assert segunda["version"] == primera["version"]
+
+
+def test_sin_red_usa_la_copia_en_disco(url, tmp_path):
+    primera = CargadorSheets(directorio=str(tmp_path)).refrescar(url)
+    Sheet.caido = True
+
+    # Un proceso nuevo no tiene nada en memoria: sale de la copia en disco
+    entrada = CargadorSheets(directorio=str(tmp_path)).refrescar(url)
+    assert entrada["version"] == primera["version"]
+    assert entrada["ruta"] == primera["ruta"]
+
+
+def test_sin_red_conserva_la_ultima_version(url, tmp_path):
+    cargador = CargadorSheets(directorio=str(tmp_path))
+    primera = cargador.refrescar(url)
+    Sheet.caido = True
+
+    assert cargador.refrescar(url)["version"] == primera["version"]
+
+
+def test_sin_red_ni_copia_falla(tmp_path):
+    cargador = CargadorSheets(directorio=str(tmp_path), timeout=1)
+    with pytest.raises(Exception):
+        cargador.refrescar("http://127.0.0.1:9/export?format=csv")
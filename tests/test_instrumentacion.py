@@ -0,0 +1,36 @@
+import tracemalloc
+
+from instrumentacion import Instrumentacion
+
+
+def test_el_pico_de_la_etapa_padre_incluye_lo_previo_a_la_hija():
+    instrumentacion = Instrumentacion(memoria=True)
+    try:
+        with instrumentacion.etapa("padre") as padre:
+            bloque = bytearray(8 * 1024 * 1024)
+            del bloque
+            with instrumentacion.etapa("hija") as hija:
+                pequeno = bytearray(1024)
+                del pequeno
+    finally:
+        instrumentacion.terminar()
+
+    assert padre["pico_bytes"] >= 8 * 1024 * 1024
+    assert hija["pico_bytes"] < 1024 * 1024
+    assert not tracemalloc.is_tracing()
+
+
+def test_el_pico_de_la_hija_se_suma_al_padre():
+    instrumentacion = Instrumentacion(memoria=True)
+    try:
+        with instrumentacion.etapa("padre") as padre:
+            with instrumentacion.etapa("hija") as hija:
+                bloque = bytearray(8 * 1024 * 1024)
+                del bloque
+            with instrumentacion.etapa("otra_hija"):
+                pass
+    finally:
+        instrumentacion.terminar()
+
+    assert hija["pico_bytes"] >= 8 * 1024 * 1024
+    assert padre["pico_bytes"] >= hija["pico_bytes"]
@@ -0,0 +1,41 @@
+import contextvars
+import json
+import tracemalloc
+
+import instrumentacion
+from refrescador import Publicaciones, Refrescador
+
+
+def test_refrescar_medido_no_toca_la_medicion_de_la_sesion(tmp_path, monkeypatch):
+    log = tmp_path / "instrumentacion.jsonl"
+    monkeypatch.setenv("INSTRUMENTACION", "1")
+    monkeypatch.setenv("INSTRUMENTACION_MEMORIA", "1")
+    monkeypatch.setenv("INSTRUMENTACION_LOG", str(log))
+
+    refrescador = Refrescador([], None, Publicaciones(str(tmp_path / "publicado")))
+
+    def refrescar():
+        with instrumentacion.etapa("descarga"):
+            return "v1"
+    monkeypatch.setattr(refrescador, "refrescar", refrescar)
+
+    # Un rerun a medio medir que dispara el primer refresco
+    def rerun():
+        sesion = instrumentacion.iniciar_desde_entorno()
+        with instrumentacion.etapa("carga"):
+            assert refrescador.refrescar_medido() == "v1"
+        assert instrumentacion._actual.get() is sesion
+        assert tracemalloc.is_tracing()
+        with instrumentacion.etapa("graficas") as registro:
+            bytearray(1024 * 1024)
+        assert registro["pico_bytes"] > 0
+        instrumentacion.terminar(origen="sesion")
+        return sesion
+
+    sesion = contextvars.copy_context().run(rerun)
+
+    assert [registro["etapa"] for registro in sesion.registros] == ["carga", "graficas"]
+    assert list(refrescador.medicion["etapa"]) == ["descarga"]
+    lineas = [json.loads(linea) for linea in log.read_text(encoding="utf-8").splitlines()]
+    assert [linea["origen"] for linea in lineas] == ["refrescador", "sesion"]
+    assert not tracemalloc.is_tracing()
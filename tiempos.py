@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+
+# Métricas de tiempos de respuesta (SLA). Todas son enteras: días hábiles o
+# candidatos, así que el "sketch" de cada grupo es un histograma exacto de
+# conteos por valor. Los histogramas se pueden sumar (ventanas de varios meses)
+# y restar (quitar los eventos viejos de una posición que cambió), y los
+# percentiles salen del conteo acumulado sin ordenar el historial.
+PRIMERA_TERNA = "Días hábiles a primera terna"
+CIERRE = "Días hábiles para cerrar"
+CANDIDATOS_TERNA = "Candidatos por terna"
+METRICAS = [PRIMERA_TERNA, CIERRE, CANDIDATOS_TERNA]
+
+CUANTILES = {"p50": 0.5, "p90": 0.9}
+
+_GRUPO = ["Metrica", "Reclutador", "Mes"]
+
+
+# Percentiles de las métricas por mes y reclutador. Guarda los eventos de cada
+# posición (para poder quitarlos cuando la posición cambia) y los conteos por
+# (métrica, reclutador, mes, valor). Como IndiceCarga, cada actualización deja
+# un estado nuevo e inmutable: {"version", "eventos", "conteos"}
+class IndiceTiempos:
+
+    def __init__(self, contador):
+        self.contador = contador
+        self._estado = None
+
+    @property
+    def version(self):
+        estado = self._estado
+        return None if estado is None else estado["version"]
+
+    def reconstruir(self, df, version):
+        eventos = _eventos(df, self.contador)
+        self._estado = {"version": version, "eventos": eventos, "conteos": _contar(eventos)}
+
+    # Solo se recalculan las posiciones que aparecen en `filas` (el delta del
+    # snapshot), con todos sus registros tomados de `df`
+    def actualizar(self, df, filas, version):
+        anterior = self._estado
+        if anterior is None:
+            raise ValueError("El índice de tiempos no se ha construido; usar reconstruir()")
+        afectadas = filas["Posicion"].unique()
+        eventos = anterior["eventos"]
+        quitar = eventos["Posicion"].isin(afectadas).to_numpy()
+        nuevos = _eventos(df[df["Posicion"].isin(afectadas)], self.contador)
+
+        conteos = anterior["conteos"].sub(_contar(eventos[quitar]), fill_value=0).add(_contar(nuevos), fill_value=0)
+        self._estado = {
+            "version": version,
+            "eventos": pd.concat([eventos[~quitar], nuevos], ignore_index=True),
+            "conteos": conteos[conteos > 0].astype("int64"),
+        }
+
+    # Percentiles móviles: cada mes junta los eventos de los últimos `meses`
+    # meses. `por` son las columnas del grupo además de Metrica y Mes. Con
+    # `version` devuelve None si el índice ya va en otra versión del dataset.
+    def percentiles(self, por=(), meses=3, version=None):
+        estado = self._estado
+        if estado is None or (version is not None and estado["version"] != version):
+            return None
+        return percentiles_moviles(estado["conteos"], list(por), meses)
+
+
+# Un renglón por evento: la primera terna y el cierre de cada posición y cada
+# terna enviada. `df` debe traer todos los registros de las posiciones que incluye.
+def _eventos(df, contador):
+    columnas = ["Posicion", "Metrica", "Reclutador", "Mes", "Valor"]
+    if df.empty:
+        return pd.DataFrame(columns=columnas)
+    df = df[["Posicion", "Fecha", "Nombre reclutador", "¿Posicion abierta?", "Terna"]].reset_index(drop=True)
+    apertura = df.groupby("Posicion", observed=True)["Fecha"].transform("min")
+
+    ternas = df[df["Terna"] > 0]
+    primeras = ternas.loc[ternas.groupby("Posicion", observed=True)["Fecha"].idxmin()]
+    ultimos = df.loc[df.groupby("Posicion", observed=True)["Fecha"].idxmax()]
+    cerradas = ultimos[~ultimos["¿Posicion abierta?"]]
+
+    partes = [
+        (PRIMERA_TERNA, primeras, contador.contar(apertura[primeras.index], primeras["Fecha"])),
+        (CIERRE, cerradas, contador.contar(apertura[cerradas.index], cerradas["Fecha"])),
+        (CANDIDATOS_TERNA, ternas, ternas["Terna"].to_numpy()),
+    ]
+    return pd.DataFrame({
+        "Posicion": np.concatenate([filas["Posicion"].astype(str).to_numpy() for _, filas, _ in partes]),
+        "Metrica": np.repeat(METRICAS, [len(filas) for _, filas, _ in partes]),
+        "Reclutador": np.concatenate([filas["Nombre reclutador"].astype(str).to_numpy() for _, filas, _ in partes]),
+        "Mes": np.concatenate([_mes(filas["Fecha"]) for _, filas, _ in partes]),
+        "Valor": np.concatenate([np.asarray(valores, dtype=np.int64) for _, _, valores in partes]),
+    })
+
+
+# Meses como enteros consecutivos (meses desde 1970) para poder desplazarlos
+def _mes(fechas):
+    return fechas.to_numpy().astype("datetime64[M]").astype(np.int64)
+
+
+def _contar(eventos):
+    return eventos.groupby(_GRUPO + ["Valor"]).size().astype("int64")
+
+
+# Percentiles por rango más cercano sobre histogramas de conteos. Cada conteo
+# se copia a los `meses` meses siguientes para formar la ventana móvil.
+def percentiles_moviles(conteos, por=(), meses=3):
+    grupo = ["Metrica"] + list(por) + ["Mes"]
+    columnas = grupo + ["Eventos"] + list(CUANTILES)
+    if conteos.empty:
+        return pd.DataFrame(columns=columnas)
+    conteos = conteos.rename("Cuenta").reset_index()
+    ultimo_mes = conteos["Mes"].max()
+    ventanas = pd.concat([
+        conteos.assign(Mes=conteos["Mes"] + desplazamiento)
+        for desplazamiento in range(meses)
+    ], ignore_index=True)
+    ventanas = ventanas[ventanas["Mes"] <= ultimo_mes]
+    ventanas = ventanas.groupby(grupo + ["Valor"], sort=True)["Cuenta"].sum().reset_index()
+
+    acumulado = ventanas.groupby(grupo)["Cuenta"].cumsum().to_numpy()
+    total = ventanas.groupby(grupo)["Cuenta"].transform("sum").to_numpy()
+    resultado = ventanas.groupby(grupo)["Cuenta"].sum().rename("Eventos").to_frame()
+    for nombre, cuantil in CUANTILES.items():
+        alcanzado = ventanas[acumulado >= cuantil * total]
+        resultado[nombre] = alcanzado.groupby(grupo)["Valor"].first()
+    resultado = resultado.reset_index()
+    resultado["Mes"] = resultado["Mes"].to_numpy().astype("datetime64[M]").astype(str)
+    return resultado[columnas]